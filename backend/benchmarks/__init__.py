@@ -0,0 +1 @@
+"""قياس أداء المتحكمات والمسارات الحساسة"""
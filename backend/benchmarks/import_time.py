@@ -0,0 +1,82 @@
+"""
+فحص زمن استيراد التطبيق (python -X importtime)
+
+التشغيل من مجلد backend:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget 1.5 --output import_time.json
+
+يفشل (رمز خروج 1) إذا استُوردت مكتبة ثقيلة يجب أن تُحمَّل عند الحاجة فقط،
+أو إذا تجاوز زمن استيراد main الحد المسموح.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+# مكتبات تُحمَّل عند أول استخدام ولا يجب أن تظهر عند بدء التشغيل
+LAZY_MODULES = ("reportlab", "arabic_reshaper", "bidi", "openpyxl", "PIL")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str = "main") -> List[Dict]:
+    """استيراد الوحدة في عملية جديدة وقراءة تقرير importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="فحص زمن استيراد التطبيق")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget", type=float, default=None, help="الحد الأقصى بالثواني لاستيراد الوحدة")
+    parser.add_argument("--top", type=int, default=15, help="عدد أثقل الوحدات في التقرير")
+    parser.add_argument("--output", help="ملف JSON للتقرير (الافتراضي: المخرجات القياسية)")
+    args = parser.parse_args(argv)
+    
+    rows = measure(args.module)
+    total = next((row["cumulative_us"] for row in rows if row["module"] == args.module), 0) / 1e6
+    imported = {row["module"].split(".")[0] for row in rows}
+    eager = sorted(imported.intersection(LAZY_MODULES))
+    
+    report = {
+        "module": args.module,
+        "total_seconds": total,
+        "module_count": len(rows),
+        "eager_lazy_modules": eager,
+        "slowest": sorted(rows, key=lambda row: row["self_us"], reverse=True)[:args.top],
+    }
+    
+    exit_code = 0
+    if eager:
+        print(f"مكتبات ثقيلة تُستورد عند البدء: {', '.join(eager)}", file=sys.stderr)
+        exit_code = 1
+    if args.budget is not None and total > args.budget:
+        print(f"زمن الاستيراد {total:.3f}s أكبر من الحد {args.budget:.3f}s", file=sys.stderr)
+        exit_code = 1
+    
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(os.path.abspath(args.output), "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
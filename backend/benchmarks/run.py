@@ -0,0 +1,283 @@
+"""
+قياس أداء المتحكمات على بيانات اصطناعية
+
+التشغيل من مجلد backend:
+    python -m benchmarks.run --sizes 1000 100000 --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 0.5
+
+كل حجم يُزرع في عجلة مستقلة داخل مجلد مؤقت، والنتائج تُكتب بصيغة JSON.
+عند تمرير baseline يُرجع البرنامج رمز خروج 1 إذا تباطأت أي عملية أكثر من الحد.
+المقارنة تستخدم أقل زمن (الأقل تأثراً بالضوضاء) مقسوماً على زمن عمل مرجعي
+ثابت يُقاس بين التكرارات، فلا يظهر تغيّر سرعة الجهاز نفسه كتباطؤ. الفروق
+الأصغر من --min-delta تُتجاهل، والأحجام التي يظهر فيها تباطؤ يُعاد قياسها
+(--confirm) ويُعتمد أفضل زمن.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from database.db import create_wheel
+from database.wheels import current_wheel
+from controllers.participant_controller import ParticipantController
+from controllers.setting_controller import SettingController
+from controllers.wheel_controller import WheelController
+from controllers.winner_controller import WinnerController
+from utils import arabic_text
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+DEFAULT_REPEAT = 5
+
+# عدد دورات العمل المرجعي (بايثون خالص) لمعرفة سرعة الجهاز لحظة القياس
+REFERENCE_LOOPS = 100000
+
+# حجم الدفعة عند زرع المشاركين
+SEED_CHUNK = 10000
+
+# عدد الفائزين المزروعين لقياس القائمة و PDF (ملف PDF لمليون فائز غير واقعي)
+MAX_SEEDED_WINNERS = 10000
+
+FIRST_NAMES = [
+    "محمد", "أحمد", "فاطمة", "عائشة", "علي", "خديجة", "عمر", "مريم", "يوسف", "نور",
+    "John", "Maria", "Ahmed", "Sara", "David", "Layla", "Omar", "Emma", "Karim", "Lina",
+]
+LAST_NAMES = [
+    "الحسن", "العلي", "الشمري", "القحطاني", "المصري", "الزهراني", "التميمي", "الخطيب",
+    "Smith", "Garcia", "Haddad", "Khan", "Brown", "Nasser", "Martin", "Saleh",
+]
+
+
+def synthetic_names(count: int, seed: int = 42) -> List[str]:
+    """أسماء فريدة عربية ولاتينية قابلة للتكرار بنفس البذرة"""
+    rng = random.Random(seed)
+    return [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}" for i in range(count)]
+
+
+def reference_time() -> float:
+    """زمن عمل مرجعي ثابت يتغير فقط مع سرعة الجهاز"""
+    start = time.perf_counter()
+    total = 0
+    for i in range(REFERENCE_LOOPS):
+        total += i * i % 7
+    return time.perf_counter() - start
+
+
+def measure(func: Callable[[], object], repeat: int, ops: int = 1, setup: Callable[[], object] = None) -> Dict:
+    """
+    تنفيذ الدالة عدة مرات (بعد تشغيل تمهيدي لا يُحسب) وإرجاع الأزمنة بالثواني لكل عملية
+    
+    بعد كل تكرار يُقاس العمل المرجعي، ويُحفظ أقل زمن له في reference.
+    """
+    if setup is not None:
+        setup()
+    func()
+    timings = []
+    references = []
+    # مثل timeit: إيقاف جامع القمامة أثناء القياس حتى لا تظهر توقفاته كتباطؤ
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) / ops)
+            references.append(reference_time())
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {
+        "repeat": repeat,
+        "ops": ops,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "reference": min(references),
+    }
+
+
+def bench_size(size: int, spins: int, repeat: int = DEFAULT_REPEAT, attempt: int = 0) -> Dict:
+    """قياس جميع العمليات على عجلة فيها size مشارك (كل محاولة في عجلة جديدة)"""
+    wheel_id = f"bench_{size}_{attempt}" if attempt else f"bench_{size}"
+    create_wheel(wheel_id)
+    current_wheel.set(wheel_id)
+    names = synthetic_names(size)
+    results = {}
+    
+    # الإضافة الجماعية: زمن زرع كل الأسماء ثم الزمن لكل اسم
+    start = time.perf_counter()
+    for offset in range(0, size, SEED_CHUNK):
+        ParticipantController.add_bulk(names[offset:offset + SEED_CHUNK])
+    elapsed = time.perf_counter() - start
+    results["participants.add_bulk"] = {
+        "repeat": 1, "ops": size, "min": elapsed / size, "median": elapsed / size, "mean": elapsed / size,
+        "total": elapsed,
+        "reference": min(reference_time() for _ in range(3)),
+    }
+    
+    results["participants.get_all"] = measure(ParticipantController.get_all, repeat=repeat)
+    def spin_many():
+        for _ in range(spins):
+            WheelController.spin()
+    results["wheel.spin"] = measure(spin_many, repeat=repeat, ops=spins)
+    
+    # فائزون إضافيون حتى تكون قائمة الفائزين وملف PDF بحجم متناسب
+    seeded = min(size, MAX_SEEDED_WINNERS)
+    WinnerController.add_many(names[:seeded])
+    results["winners.get_all"] = measure(WinnerController.get_all, repeat=repeat)
+    
+    def render_cold():
+        WinnerController.invalidate_pdf()
+        arabic_text.clear_cache()
+    
+    def render():
+        WinnerController.generate_pdf().close()
+    results["winners.generate_pdf.cold"] = measure(render, repeat=2, setup=render_cold)
+    results["winners.generate_pdf.cached"] = measure(render, repeat=repeat)
+    
+    SettingController.invalidate()
+    
+    def read_settings():
+        for _ in range(1000):
+            SettingController.get_all()
+    results["settings.get_all"] = measure(read_settings, repeat=repeat, ops=1000)
+    
+    def write_settings():
+        for i in range(100):
+            SettingController.update_many({"wheel_title": f"عجلة {i}", "max_display_names": i})
+    results["settings.update_many"] = measure(write_settings, repeat=repeat, ops=100)
+    
+    return results
+
+
+def merge_best(results: Dict, retry: Dict) -> Dict:
+    """دمج قياسين لنفس الحجم مع اعتماد أقل زمن لكل عملية"""
+    return {
+        name: min(stats, retry.get(name, stats), key=lambda item: item["min"])
+        for name, stats in results.items()
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_delta: float = 0.0) -> List[Dict]:
+    """
+    مقارنة أقل زمن لكل عملية مع خط الأساس
+    
+    النسبة تُحسب بعد القسمة على زمن العمل المرجعي إن وُجد في القياسين. التباطؤ
+    يُحسب فقط إذا تجاوزت النسبة threshold وزاد الزمن لكل عملية بأكثر من min_delta ثانية.
+    """
+    rows = []
+    for size, operations in current["results"].items():
+        base_operations = baseline.get("results", {}).get(size, {})
+        for name, stats in operations.items():
+            base = base_operations.get(name)
+            if not base or not base.get("min"):
+                continue
+            ratio = stats["min"] / base["min"]
+            if stats.get("reference") and base.get("reference"):
+                ratio /= stats["reference"] / base["reference"]
+            rows.append({
+                "size": size,
+                "operation": name,
+                "baseline": base["min"],
+                "current": stats["min"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold and stats["min"] - base["min"] > min_delta,
+            })
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="قياس أداء عجلة الحظ")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--spins", type=int, default=100, help="عدد مرات التدوير في كل قياس")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="عدد مرات تكرار كل قياس")
+    parser.add_argument("--output", help="ملف JSON للنتائج (الافتراضي: المخرجات القياسية)")
+    parser.add_argument("--baseline", help="ملف نتائج سابق للمقارنة")
+    parser.add_argument(
+        "--threshold", type=float, default=0.5,
+        help="نسبة التباطؤ المسموحة (0.5 = 50%%، يمكن تقليلها على جهاز هادئ)"
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=0.00005,
+        help="أقل زيادة في الزمن لكل عملية (بالثواني) تُعد تباطؤاً"
+    )
+    parser.add_argument("--confirm", type=int, default=2, help="عدد مرات إعادة قياس الأحجام التي ظهر فيها تباطؤ")
+    args = parser.parse_args(argv)
+    
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "spins": args.spins,
+            "repeat": args.repeat,
+            "confirm": args.confirm,
+        },
+        "results": {},
+    }
+    
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    
+    # قواعد البيانات ومجلدات العجلات تُنشأ في مجلد مؤقت يُحذف في النهاية
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="wheel-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                print(f"قياس {size} مشارك...", file=sys.stderr)
+                report["results"][str(size)] = bench_size(size, args.spins, args.repeat)
+            
+            if baseline is not None:
+                report["comparison"] = compare(report, baseline, args.threshold, args.min_delta)
+                # التأكد من التباطؤ بإعادة القياس قبل اعتباره حقيقياً
+                for attempt in range(1, args.confirm + 1):
+                    suspects = sorted({row["size"] for row in report["comparison"] if row["regression"]}, key=int)
+                    if not suspects:
+                        break
+                    for size in suspects:
+                        print(f"إعادة قياس {size} مشارك للتأكد ({attempt})...", file=sys.stderr)
+                        retry = bench_size(int(size), args.spins, args.repeat, attempt)
+                        report["results"][size] = merge_best(report["results"][size], retry)
+                    report["comparison"] = compare(report, baseline, args.threshold, args.min_delta)
+        finally:
+            os.chdir(cwd)
+    
+    exit_code = 0
+    if baseline is not None:
+        regressions = [row for row in report["comparison"] if row["regression"]]
+        for row in regressions:
+            print(
+                f"تباطؤ: {row['operation']} ({row['size']}) x{row['ratio']:.2f}",
+                file=sys.stderr
+            )
+        exit_code = 1 if regressions else 0
+    
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,85 @@
 """إعدادات التطبيق"""
+import os
 from pathlib import Path
 
 # إعدادات قاعدة البيانات
 DATABASE = "wheel_of_fortune.db"
+DB_BUSY_TIMEOUT = 5.0  # ثوانٍ انتظار قفل الكتابة
+DB_CACHE_SIZE_KB = 16384  # حجم ذاكرة الصفحات لكل اتصال (16MB)
+DB_MMAP_SIZE = 256 * 1024 * 1024  # حجم الـ mmap (256MB)
+DB_THREADS = 4  # عدد خيوط تنفيذ عمليات SQLite
+CPU_THREADS = 2  # عدد خيوط الأعمال الثقيلة (مثل إنشاء PDF)
+COMPRESSION_THREADS = 2  # عدد خيوط ضغط الاستجابات الكبيرة
+
+# إعدادات العجلات المتعددة (لكل عجلة ملف SQLite خاص بها)
+WHEELS_DIR = Path("wheels")
+DB_MAX_OPEN_WHEELS = 64  # أقصى عدد اتصالات مفتوحة لكل خيط قبل إغلاق الأقدم استخداماً
+
+# الحد الأقصى لعدد الفائزين في سحب واحد
+MAX_BATCH_DRAW = 1000
+
+# مفاتيح منع تكرار السحب (ترويسة Idempotency-Key)
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_KEY_TTL_HOURS = 24  # مدة الاحتفاظ بنتيجة كل مفتاح
+
+# إعدادات الأوزان (عدد التذاكر لكل مشارك)
+MAX_PARTICIPANT_WEIGHT = 10000
+WEIGHTED_REBUILD_RATIO = 0.5  # إعادة بناء جدول الاختيار عندما يتجاوز وزن المسحوبين هذه النسبة
+WEIGHTED_POOL_MAX_WHEELS = 8  # عدد العجلات التي يُحفظ جدول اختيارها في الذاكرة
+
+# إعدادات الإضافة الجماعية للمشاركين
+BULK_INSERT_CHUNK = 500  # عدد الأسماء في كل دفعة executemany
+BULK_SKIPPED_SAMPLE_MAX = 1000  # أقصى عدد لعينة الأسماء المتجاهلة في الاستجابة
+
+# إعدادات استيراد المشاركين من الملفات
+IMPORT_BATCH_SIZE = 5000  # عدد الأسماء في كل معاملة
+IMPORT_READ_CHUNK = 1024 * 1024  # حجم القراءة من الملف (1MB)
+
+# إعدادات الترقيم
+MAX_PAGE_SIZE = 1000
+
+# إعدادات الأحداث الفورية (SSE)
+EVENTS_QUEUE_SIZE = 256  # أقصى عدد أحداث معلّقة لكل عميل قبل طلب إعادة المزامنة
+EVENTS_KEEPALIVE = 15.0  # ثوانٍ بين رسائل الحفاظ على الاتصال
+
+# إعدادات ملف PDF للفائزين
+PDF_ROWS_PER_TABLE = 25  # عدد الصفوف في كل جدول (صفحة تقريباً)
+PDF_SPOOL_MAX_BYTES = 4 * 1024 * 1024  # ما يزيد عن ذلك يُكتب على القرص
+PDF_CACHE_MAX_BYTES = 8 * 1024 * 1024  # أكبر ملف يُحفظ في الذاكرة المؤقتة
+PDF_CACHE_MAX_WHEELS = 8  # عدد العجلات التي يُحفظ ملف PDF الخاص بها
+
+# حجم ذاكرة تشكيل النص العربي (عدد النصوص المختلفة)
+TEXT_SHAPING_CACHE_SIZE = 50000
+
+# مقاييس الأداء (/metrics بصيغة Prometheus)
+METRICS_ENABLED = True
+
+# ضغط الاستجابات (gzip دائماً، و brotli أو zstd إذا كانت المكتبة مثبتة)
+COMPRESSION_ENABLED = True
+COMPRESSION_MIN_SIZE = 1024  # أصغر استجابة تُضغط (بالبايت)
+COMPRESSION_OFFLOAD_SIZE = 256 * 1024  # الأجزاء الأكبر تُضغط في خيوط الضغط
+COMPRESSION_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}  # مستوى الضغط لكل صيغة
+COMPRESSION_TYPES = (
+    "application/json",
+    "application/pdf",
+    "text/plain",
+    "text/csv",
+    "text/html",
+)  # أنواع المحتوى المسموح بضغطها (أحداث SSE والصور غير مشمولة)
+
+# تحليل أداء الطلبات (cProfile)
+PROFILE_ALL_REQUESTS = False  # تحليل كل الطلبات (للتشخيص المؤقت فقط)
+PROFILE_SECRET = os.environ.get("WHEEL_PROFILE_SECRET", "")  # مفتاح توقيع ترويسة X-Profile وواجهة الإدارة
+PROFILE_DIR = Path("profiles")
+PROFILE_KEEP = 50  # عدد ملفات التحليل المحفوظة (تُحذف الأقدم)
 
 # إعدادات مجلد الصور
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_DIR = Path("uploads")  # يُنشأ عند بدء التطبيق
+MAX_IMAGE_UPLOAD_BYTES = 15 * 1024 * 1024  # الحد الأقصى لحجم صورة العجلة
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # هامش لترويسات نموذج multipart فوق حجم الصورة
+WHEEL_IMAGE_SIZES = (256, 512, 1024)  # أحجام النسخ المصغرة لصورة العجلة (بالبكسل)
+UPLOAD_HASH_LENGTH = 16  # طول بصمة المحتوى في أسماء الملفات المرفوعة
+STATIC_MAX_AGE = 365 * 24 * 3600  # مدة التخزين المؤقت للملفات ذات البصمة (بالثواني)
 
 # إعدادات CORS
 CORS_ORIGINS = ["http://localhost:3000", "http://localhost:5173"]
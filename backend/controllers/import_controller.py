@@ -0,0 +1,184 @@
+"""متحكم استيراد المشاركين من الملفات"""
+import codecs
+import csv
+from importlib.util import find_spec
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+from fastapi import UploadFile
+from config.config import IMPORT_BATCH_SIZE, IMPORT_READ_CHUNK
+from controllers.participant_controller import ParticipantController
+from events.broker import publish
+
+# openpyxl يُحمَّل عند أول ملف XLSX فقط
+XLSX_SUPPORT = find_spec("openpyxl") is not None
+
+
+# الصيغ المدعومة حسب امتداد الملف
+SUPPORTED_FORMATS = {".csv": "csv", ".txt": "txt", ".xlsx": "xlsx"}
+
+
+class ImportController:
+    """متحكم استيراد المشاركين من ملفات CSV و TXT و XLSX"""
+    
+    @staticmethod
+    def detect_format(file: UploadFile) -> str:
+        """تحديد صيغة الملف من امتداده أو نوعه"""
+        suffix = Path(file.filename or "").suffix.lower()
+        if suffix in SUPPORTED_FORMATS:
+            return SUPPORTED_FORMATS[suffix]
+        content_type = file.content_type or ""
+        if content_type == "text/csv":
+            return "csv"
+        if content_type == "text/plain":
+            return "txt"
+        if "spreadsheetml" in content_type:
+            return "xlsx"
+        return ""
+    
+    @staticmethod
+    def _iter_lines(stream: BinaryIO) -> Iterator[str]:
+        """قراءة الملف على دفعات وفك ترميزه تدريجياً إلى أسطر"""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        pending = ""
+        while True:
+            chunk = stream.read(IMPORT_READ_CHUNK)
+            final = not chunk
+            pending += decoder.decode(chunk, final=final)
+            lines = pending.splitlines(keepends=True)
+            # السطر الأخير قد يكون غير مكتمل فنحتفظ به للدفعة التالية
+            pending = lines.pop() if lines and not final else ""
+            yield from lines
+            if final:
+                if pending:
+                    yield pending
+                return
+    
+    @staticmethod
+    def _iter_txt(stream: BinaryIO) -> Iterator[str]:
+        """اسم واحد في كل سطر"""
+        return ImportController._iter_lines(stream)
+    
+    @staticmethod
+    def _iter_csv(stream: BinaryIO, column: int) -> Iterator[str]:
+        """قراءة عمود واحد من ملف CSV"""
+        for row in csv.reader(ImportController._iter_lines(stream)):
+            if len(row) > column:
+                yield row[column]
+    
+    @staticmethod
+    def _iter_xlsx(stream: BinaryIO, column: int) -> Iterator[str]:
+        """قراءة عمود واحد من الورقة الأولى في ملف XLSX بوضع القراءة فقط"""
+        from openpyxl import load_workbook
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            for row in sheet.iter_rows(min_col=column + 1, max_col=column + 1, values_only=True):
+                if row and row[0] is not None:
+                    yield str(row[0])
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _batched(names: Iterable[str], size: int) -> Iterator[List[str]]:
+        """تجميع الأسماء في دفعات ثابتة الحجم"""
+        batch = []
+        for name in names:
+            batch.append(name)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    @staticmethod
+    def iter_import(stream: BinaryIO, file_format: str, column: int = 0, has_header: bool = False) -> Iterator[Dict]:
+        """
+        استيراد الأسماء من الملف دفعة بعد دفعة
+        
+        يُرجع تقدم العملية بعد كل دفعة، والعنصر الأخير يحتوي على الإجماليات.
+        حدث participants_added يُرسل مرة واحدة في النهاية (أو عند التوقف بخطأ)
+        حتى لا تعيد الشاشات تحميل القائمة بعد كل دفعة.
+        """
+        if file_format == "csv":
+            names = ImportController._iter_csv(stream, column)
+        elif file_format == "xlsx":
+            names = ImportController._iter_xlsx(stream, column)
+        else:
+            names = ImportController._iter_txt(stream)
+        
+        if has_header:
+            next(names, None)
+        
+        processed = 0
+        added = 0
+        skipped = 0
+        try:
+            for batch in ImportController._batched(names, IMPORT_BATCH_SIZE):
+                # كل دفعة في معاملة مستقلة حتى لا يتضخم ملف WAL
+                result = ParticipantController.add_bulk(batch, notify=False)
+                processed += len(batch)
+                added += result["added_count"]
+                skipped += result["skipped_count"]
+                yield {"done": False, "processed": processed, "added_count": added, "skipped_count": skipped}
+        finally:
+            # الدفعات السابقة حُفظت بالفعل حتى لو توقف الاستيراد
+            if added:
+                publish("participants_added", added_count=added)
+        
+        yield {
+            "done": True,
+            "processed": processed,
+            "added_count": added,
+            "skipped_count": skipped,
+            "message": f"تم إضافة {added} مشارك"
+        }
+    
+    @staticmethod
+    def _check_xlsx(stream: BinaryIO):
+        """فتح ملف XLSX للتأكد من صلاحيته قبل بدء الاستيراد (يرفع استثناءً إذا كان تالفاً)"""
+        from openpyxl import load_workbook
+        try:
+            load_workbook(stream, read_only=True, data_only=True).close()
+        finally:
+            stream.seek(0)
+    
+    @staticmethod
+    def validate(file: UploadFile) -> Dict:
+        """التحقق من إمكانية استيراد الملف"""
+        file_format = ImportController.detect_format(file)
+        if not file_format:
+            return {
+                "success": False,
+                "message": "صيغة الملف غير مدعومة (CSV أو TXT أو XLSX)"
+            }
+        if file_format == "xlsx" and not XLSX_SUPPORT:
+            return {
+                "success": False,
+                "message": "مكتبة openpyxl غير مثبتة لقراءة ملفات XLSX"
+            }
+        if file_format == "xlsx":
+            try:
+                ImportController._check_xlsx(file.file)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "message": f"خطأ في قراءة الملف: {str(e)}"
+                }
+        return {"success": True, "format": file_format}
+    
+    @staticmethod
+    def import_participants(file: UploadFile, column: int = 0, has_header: bool = False) -> Dict:
+        """استيراد المشاركين من ملف وإرجاع الإجماليات فقط"""
+        validation = ImportController.validate(file)
+        if not validation["success"]:
+            return validation
+        try:
+            summary = {}
+            for summary in ImportController.iter_import(file.file, validation["format"], column, has_header):
+                pass
+            return {"success": True, **summary}
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"خطأ في قراءة الملف: {str(e)}"
+            }
@@ -1,96 +1,394 @@
 """متحكم المشاركين"""
 import sqlite3
-from typing import List, Dict
-from database.db import get_db_connection
+import secrets
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Optional, Set, Tuple
+from database.db import get_db
+from database.pagination import encode_cursor, decode_cursor
+from database.wheels import current_wheel
+from events.broker import publish
+from config.config import BULK_INSERT_CHUNK, WEIGHTED_POOL_MAX_WHEELS, WEIGHTED_REBUILD_RATIO
+from utils.alias_table import AliasTable
+
+# عدد محاولات الاختيار المباشر عبر المعرّف قبل الرجوع إلى OFFSET
+RANDOM_PICK_ATTEMPTS = 8
+
+
+class _WeightedPool:
+    """جدول الاختيار الموزون لنسخة من المشاركين مع تتبع من سُحب بعد بنائه"""
+    
+    def __init__(self, version: int, rows: List[Tuple[int, str, int]]):
+        self.version = version
+        self.ids = array("q", (row[0] for row in rows))
+        self.names = [row[1] for row in rows]
+        self.weights = array("q", (row[2] for row in rows))
+        self.positions = {participant_id: index for index, participant_id in enumerate(self.ids)}
+        self.table = AliasTable(self.weights)
+        self.total_weight = sum(self.weights)
+        self.removed: Set[int] = set()
+        self.removed_weight = 0
+    
+    def stale(self) -> bool:
+        """هل أصبح وزن المسحوبين كبيراً بحيث تكثر إعادة المحاولة"""
+        return self.removed_weight > self.total_weight * WEIGHTED_REBUILD_RATIO
+    
+    def sample(self) -> Tuple[int, str]:
+        """اختيار مشارك متبقٍ باحتمال متناسب مع وزنه"""
+        # رفض المسحوبين وإعادة الاختيار يحافظ على التناسب بين المتبقين
+        while True:
+            index = self.table.sample()
+            if index not in self.removed:
+                return self.ids[index], self.names[index]
+    
+    def discard(self, participant_id: int):
+        """استبعاد مشارك حُذف بعد بناء الجدول"""
+        index = self.positions.get(participant_id)
+        if index is not None and index not in self.removed:
+            self.removed.add(index)
+            self.removed_weight += self.weights[index]
 
 
 class ParticipantController:
     """متحكم عمليات المشاركين"""
     
+    # جداول الاختيار الموزون لكل عجلة (تُبنى عند الحاجة، الأحدث استخداماً في النهاية)
+    _pools: "OrderedDict[str, _WeightedPool]" = OrderedDict()
+    _pools_lock = threading.Lock()
+    
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> Tuple[int, int]:
+        """
+        تغيير نسخة جدول المشاركين ضمن معاملة التعديل نفسها
+
+        النسخة قيمة عشوائية وليست عداداً حتى لا تتكرر قيمة قديمة بعد rollback.
+        """
+        old = conn.execute("SELECT value FROM counters WHERE name = 'participants'").fetchone()[0]
+        new = secrets.randbits(62)
+        conn.execute("UPDATE counters SET value = ? WHERE name = 'participants'", (new,))
+        return old, new
+    
+    @staticmethod
+    def _record_removal(conn: sqlite3.Connection, participant_id: int):
+        """تحديث جدول الاختيار الموزون بعد حذف مشارك بدلاً من إعادة بنائه"""
+        old, new = ParticipantController._bump_version(conn)
+        with ParticipantController._pools_lock:
+            pool = ParticipantController._pools.get(current_wheel.get())
+            if pool is not None and pool.version == old:
+                pool.discard(participant_id)
+                pool.version = new
+    
     @staticmethod
     def get_all() -> List[str]:
         """الحصول على قائمة جميع المشاركين"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM participants ORDER BY created_at DESC")
-        participants = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        with get_db(label="ParticipantController.get_all") as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM participants ORDER BY created_at DESC, id DESC")
+            participants = [row[0] for row in cursor.fetchall()]
         return participants
     
     @staticmethod
-    def add(name: str) -> Dict:
+    def get_page(limit: int, cursor: Optional[str] = None) -> Dict:
+        """الحصول على صفحة من المشاركين باستخدام مؤشر (من الأحدث إلى الأقدم)"""
+        try:
+            after = decode_cursor(cursor, 2)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        
+        with get_db(label="ParticipantController.get_page") as conn:
+            if after is None:
+                rows = conn.execute("""
+                    SELECT id, name, created_at FROM participants
+                    ORDER BY created_at DESC, id DESC LIMIT ?
+                """, (limit + 1,)).fetchall()
+            else:
+                # SQLite يستخدم created_at فقط من مقارنة (created_at, id) في الفهرس، والإضافة
+                # الجماعية تعطي آلاف الصفوف نفس الثانية، فيُقسم الشرط إلى بحثين على الفهرس
+                rows = conn.execute("""
+                    SELECT id, name, created_at FROM (
+                        SELECT * FROM (
+                            SELECT id, name, created_at FROM participants
+                            WHERE created_at = ? AND id < ?
+                            ORDER BY id DESC LIMIT ?
+                        )
+                        UNION ALL
+                        SELECT * FROM (
+                            SELECT id, name, created_at FROM participants
+                            WHERE created_at < ?
+                            ORDER BY created_at DESC, id DESC LIMIT ?
+                        )
+                    )
+                    ORDER BY created_at DESC, id DESC LIMIT ?
+                """, (after[0], after[1], limit + 1, after[0], limit + 1, limit + 1)).fetchall()
+        
+        # جلب صف إضافي لمعرفة وجود صفحة تالية
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][2], rows[-1][0]]) if has_more else None
+        return {
+            "success": True,
+            "participants": [row[1] for row in rows],
+            "next_cursor": next_cursor
+        }
+    
+    @staticmethod
+    def add(name: str, weight: int = 1) -> Dict:
         """إضافة مشارك واحد"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO participants (name) VALUES (?)", (name.strip(),))
-            conn.commit()
-            conn.close()
+            with get_db(label="ParticipantController.add") as conn:
+                conn.execute(
+                    "INSERT INTO participants (name, weight) VALUES (?, ?)", (name.strip(), weight)
+                )
+                ParticipantController._bump_version(conn)
+            publish("participant_added", name=name.strip())
             return {"success": True, "message": "تم إضافة المشارك بنجاح", "name": name}
         except sqlite3.IntegrityError:
-            conn.close()
             return {"success": False, "message": "هذا الاسم موجود بالفعل"}
     
     @staticmethod
-    def add_bulk(names: List[str]) -> Dict:
-        """إضافة عدة مشاركين دفعة واحدة"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        added = []
+    def insert_chunk(
+        names: List[str],
+        skipped: Optional[List[str]] = None,
+        sample_limit: int = 0,
+        weight: int = 1
+    ) -> int:
+        """
+        إدراج دفعة من الأسماء المنظفة وإرجاع عدد ما أُضيف فعلاً
+
+        الأسماء الموجودة مسبقاً يتم تجاهلها عبر INSERT OR IGNORE، وإذا طُلبت
+        عينة منها تُضاف إلى skipped حتى sample_limit.
+        """
+        if not names:
+            return 0
+        with get_db(label="ParticipantController.insert_chunk") as conn:
+            if skipped is not None and len(skipped) < sample_limit:
+                placeholders = ",".join("?" * len(names))
+                cursor = conn.execute(
+                    f"SELECT name FROM participants WHERE name IN ({placeholders})", names
+                )
+                for row in cursor:
+                    if len(skipped) >= sample_limit:
+                        break
+                    skipped.append(row[0])
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO participants (name, weight) VALUES (?, ?)",
+                ((name, weight) for name in names)
+            )
+            added = cursor.rowcount
+            if added:
+                ParticipantController._bump_version(conn)
+        return added
+    
+    @staticmethod
+    def add_bulk(names: List[str], skipped_sample: int = 0, weight: int = 1, notify: bool = True) -> Dict:
+        """
+        إضافة عدة مشاركين دفعة واحدة
+
+        notify=False يؤجل حدث participants_added للمستدعي (مثل الاستيراد على دفعات).
+        """
         skipped = []
+        unique = []
+        seen = set()
+        duplicates_count = 0
         
+        # تنظيف الأسماء وإزالة التكرار داخل القائمة نفسها
         for name in names:
             name = name.strip()
             if not name:
                 continue
-            try:
-                cursor.execute("INSERT INTO participants (name) VALUES (?)", (name,))
-                added.append(name)
-            except sqlite3.IntegrityError:
-                skipped.append(name)
+            if name in seen:
+                duplicates_count += 1
+                if len(skipped) < skipped_sample:
+                    skipped.append(name)
+                continue
+            seen.add(name)
+            unique.append(name)
         
-        conn.commit()
-        conn.close()
+        added_count = 0
+        with get_db(label="ParticipantController.add_bulk"):
+            for start in range(0, len(unique), BULK_INSERT_CHUNK):
+                added_count += ParticipantController.insert_chunk(
+                    unique[start:start + BULK_INSERT_CHUNK], skipped, skipped_sample, weight
+                )
+        
+        if added_count and notify:
+            publish("participants_added", added_count=added_count)
         
         return {
             "success": True,
-            "message": f"تم إضافة {len(added)} مشارك",
-            "added": added,
+            "message": f"تم إضافة {added_count} مشارك",
             "skipped": skipped,
-            "added_count": len(added),
-            "skipped_count": len(skipped)
+            "added_count": added_count,
+            "skipped_count": duplicates_count + len(unique) - added_count
         }
     
     @staticmethod
     def remove(name: str) -> Dict:
         """حذف مشارك"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM participants WHERE name = ?", (name,))
-        if cursor.rowcount == 0:
-            conn.close()
+        with get_db(label="ParticipantController.remove") as conn:
+            rows = conn.execute("DELETE FROM participants WHERE name = ? RETURNING id", (name,)).fetchall()
+            row = rows[0] if rows else None
+            if row is not None:
+                ParticipantController._record_removal(conn, row[0])
+        if row is None:
             return {"success": False, "message": "المشارك غير موجود"}
-        conn.commit()
-        conn.close()
+        publish("participant_removed", name=name)
         return {"success": True, "message": "تم حذف المشارك بنجاح"}
     
+    @staticmethod
+    def remove_by_id(participant_id: int) -> Optional[str]:
+        """حذف مشارك بالمعرّف وإرجاع اسمه من نفس عملية الحذف (None إذا لم يكن موجوداً)"""
+        with get_db(label="ParticipantController.remove_by_id") as conn:
+            row = conn.execute(
+                "DELETE FROM participants WHERE id = ? RETURNING name", (participant_id,)
+            ).fetchone()
+            if row:
+                ParticipantController._record_removal(conn, participant_id)
+        return row[0] if row else None
+    
+    @staticmethod
+    def set_weight(name: str, weight: int) -> Dict:
+        """تغيير عدد تذاكر مشارك"""
+        with get_db(label="ParticipantController.set_weight") as conn:
+            updated = conn.execute(
+                "UPDATE participants SET weight = ? WHERE name = ?", (weight, name)
+            ).rowcount
+            if updated:
+                ParticipantController._bump_version(conn)
+        if not updated:
+            return {"success": False, "message": "المشارك غير موجود"}
+        publish("participant_updated", name=name, weight=weight)
+        return {"success": True, "message": "تم تحديث وزن المشارك", "name": name, "weight": weight}
+    
+    @staticmethod
+    def has_weights() -> bool:
+        """هل يوجد مشارك بوزن مختلف عن 1 (عبر الفهرس الجزئي)"""
+        with get_db(label="ParticipantController.has_weights") as conn:
+            return bool(conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM participants WHERE weight != 1)"
+            ).fetchone()[0])
+    
+    @staticmethod
+    def pick(total: int) -> Optional[Tuple[int, str]]:
+        """اختيار مشارك: حسب الوزن إذا وُجدت أوزان وإلا بتوزيع متساوٍ"""
+        if total <= 0:
+            return None
+        if ParticipantController.has_weights():
+            return ParticipantController.pick_weighted()
+        return ParticipantController.pick_random(total)
+    
+    @staticmethod
+    def weighted_pool() -> Optional[_WeightedPool]:
+        """
+        جدول الاختيار الموزون للعجلة الحالية، ويُعاد بناؤه إذا تغيّر المشاركون
+
+        النسخة والصفوف تُقرأ في معاملة قراءة واحدة حتى يطابق الجدول نسخته.
+        """
+        wheel_id = current_wheel.get()
+        with get_db(snapshot=True, label="ParticipantController.weighted_pool") as conn:
+            version = conn.execute("SELECT value FROM counters WHERE name = 'participants'").fetchone()[0]
+            with ParticipantController._pools_lock:
+                pool = ParticipantController._pools.get(wheel_id)
+                if pool is not None:
+                    ParticipantController._pools.move_to_end(wheel_id)
+            if pool is not None and pool.version == version and not pool.stale():
+                return pool
+            rows = conn.execute("SELECT id, name, weight FROM participants WHERE weight > 0").fetchall()
+        
+        pool = _WeightedPool(version, rows) if rows else None
+        with ParticipantController._pools_lock:
+            if pool is None:
+                ParticipantController._pools.pop(wheel_id, None)
+            else:
+                ParticipantController._pools[wheel_id] = pool
+                ParticipantController._pools.move_to_end(wheel_id)
+                # كل جدول قد يشغل عدة ميغابايت فيُحذف الأقدم استخداماً
+                while len(ParticipantController._pools) > WEIGHTED_POOL_MAX_WHEELS:
+                    ParticipantController._pools.popitem(last=False)
+        return pool
+    
+    @staticmethod
+    def prepare_weighted_pool():
+        """
+        تجهيز جدول الاختيار الموزون قبل معاملة السحب
+
+        قراءة جميع المشاركين وبناء الجدول يتمان هنا دون حجز قفل الكتابة، فلا يبقى
+        داخل BEGIN IMMEDIATE إلا التحقق من النسخة (وإعادة البناء فقط إذا تغيّر
+        المشاركون بين الخطوتين).
+        """
+        if ParticipantController.has_weights():
+            ParticipantController.weighted_pool()
+    
+    @staticmethod
+    def pick_weighted() -> Optional[Tuple[int, str]]:
+        """
+        اختيار مشارك باحتمال متناسب مع وزنه بزمن ثابت
+
+        يُستدعى داخل معاملة السحب حتى تطابق نسخة الجدول حالة قاعدة البيانات.
+        """
+        with get_db(label="ParticipantController.pick_weighted"):
+            pool = ParticipantController.weighted_pool()
+        return pool.sample() if pool is not None else None
+    
+    @staticmethod
+    def id_bounds() -> Tuple[Optional[int], Optional[int]]:
+        """أصغر وأكبر معرّف للمشاركين (None إذا كانت العجلة فارغة)"""
+        with get_db(label="ParticipantController.id_bounds") as conn:
+            # استعلامان فرعيان حتى يستخدم SQLite بحث MIN/MAX المباشر على المفتاح بدل مسح الجدول
+            return tuple(conn.execute(
+                "SELECT (SELECT MIN(id) FROM participants), (SELECT MAX(id) FROM participants)"
+            ).fetchone())
+    
+    @staticmethod
+    def pick_random(
+        total: int,
+        bounds: Optional[Tuple[Optional[int], Optional[int]]] = None
+    ) -> Optional[Tuple[int, str]]:
+        """
+        اختيار مشارك عشوائي بتوزيع متساوٍ دون تحميل القائمة
+
+        عندما تكون المعرّفات متقاربة نختار معرّفاً عشوائياً ونبحث عنه مباشرة
+        عبر المفتاح الأساسي، وإلا نستخدم إزاحة عشوائية على الفهرس.
+        bounds يسمح بتمرير حدود المعرّفات المحسوبة مسبقاً في السحب المتعدد،
+        فالحذف بعدها لا يخرج أي مشارك متبقٍ عنها.
+        """
+        if total <= 0:
+            return None
+        with get_db(label="ParticipantController.pick_random") as conn:
+            min_id, max_id = bounds if bounds is not None else ParticipantController.id_bounds()
+            if min_id is None:
+                return None
+            span = max_id - min_id + 1
+            if total * 4 >= span:
+                for _ in range(RANDOM_PICK_ATTEMPTS):
+                    candidate = min_id + secrets.randbelow(span)
+                    row = conn.execute(
+                        "SELECT id, name FROM participants WHERE id = ?", (candidate,)
+                    ).fetchone()
+                    if row:
+                        return row[0], row[1]
+            offset = secrets.randbelow(total)
+            row = conn.execute(
+                "SELECT id, name FROM participants ORDER BY id LIMIT 1 OFFSET ?", (offset,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+    
     @staticmethod
     def clear_all() -> Dict:
         """مسح جميع المشاركين"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM participants")
-        conn.commit()
-        conn.close()
+        with get_db(label="ParticipantController.clear_all") as conn:
+            conn.execute("DELETE FROM participants")
+            ParticipantController._bump_version(conn)
+        # لا فائدة من الاحتفاظ بجدول عجلة فارغة
+        with ParticipantController._pools_lock:
+            ParticipantController._pools.pop(current_wheel.get(), None)
+        publish("participants_cleared")
         return {"success": True, "message": "تم مسح جميع المشاركين"}
     
     @staticmethod
     def count() -> int:
         """عدد المشاركين المتبقين"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM participants")
-        count = cursor.fetchone()[0]
-        conn.close()
+        with get_db(label="ParticipantController.count") as conn:
+            count = conn.execute("SELECT COUNT(*) FROM participants").fetchone()[0]
         return count
-
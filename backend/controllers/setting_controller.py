@@ -1,60 +1,141 @@
 """متحكم الإعدادات"""
-from typing import Dict, Optional
-from database.db import get_db_connection
+import secrets
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Tuple
+from database.db import get_db
+from database.wheels import current_wheel
+from events.broker import publish
+
+
+def _parse_int(value: Optional[str]) -> int:
+    return int(value) if value and value.isdigit() else 0  # 0 يعني بدون حد
+
+
+def _parse_bool(value: Optional[str]) -> bool:
+    return value.lower() == 'true' if value else False
+
+
+# مفاتيح الإعدادات: (دالة التحويل من النص مع القيمة الافتراضية، دالة التحويل إلى النص)
+SETTINGS_SCHEMA = {
+    "wheel_title": (lambda v: v or "", lambda v: str(v).strip()),
+    "text_color": (lambda v: v or "#333333", lambda v: str(v).strip()),  # افتراضي داكن للنص
+    "max_display_names": (_parse_int, lambda v: str(max(0, int(v)))),  # على الأقل 0 (بدون حد)
+    "sound_muted": (_parse_bool, lambda v: str(bool(v)).lower()),  # افتراضي: الصوت غير مكتوم
+}
 
 
 class SettingController:
     """متحكم عمليات الإعدادات"""
     
+    # ذاكرة مؤقتة لجميع القيم الخام لكل عجلة مع نسخة الإعدادات التي حُمّلت منها
+    # (None تعني غير محفوظة)
+    _caches: Dict[str, Tuple[int, Dict[str, Optional[str]]]] = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection):
+        """تغيير نسخة الإعدادات ضمن معاملة التعديل حتى تعيد العمليات الأخرى التحميل"""
+        conn.execute("UPDATE counters SET value = ? WHERE name = 'settings'", (secrets.randbits(62),))
+    
+    @staticmethod
+    def _load() -> Dict[str, Optional[str]]:
+        """
+        تحميل جميع إعدادات العجلة الحالية إلى الذاكرة
+        
+        قبل استخدام الذاكرة تُقرأ نسخة الإعدادات من جدول counters (استعلام واحد
+        بالمفتاح الأساسي)، فيظهر تعديل أي worker آخر في الطلب التالي.
+        """
+        wheel_id = current_wheel.get()
+        with get_db(snapshot=True, label="SettingController._load") as conn:
+            version = conn.execute("SELECT value FROM counters WHERE name = 'settings'").fetchone()[0]
+            cached = SettingController._caches.get(wheel_id)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            rows = conn.execute("SELECT key, value FROM settings").fetchall()
+        stored = dict(rows)
+        cache = {key: stored.get(key) for key in SETTINGS_SCHEMA}
+        with SettingController._lock:
+            SettingController._caches[wheel_id] = (version, cache)
+        return cache
+    
+    @staticmethod
+    def invalidate():
+        """إبطال ذاكرة العجلة الحالية ليُعاد تحميلها عند القراءة التالية"""
+        with SettingController._lock:
+            SettingController._caches.pop(current_wheel.get(), None)
+    
+    @staticmethod
+    def _get(key: str) -> Dict:
+        """قراءة مفتاح واحد من الذاكرة المؤقتة"""
+        raw = SettingController._load()[key]
+        parse = SETTINGS_SCHEMA[key][0]
+        return {"value": parse(raw), "exists": raw is not None}
+    
+    @staticmethod
+    def get_all() -> Dict[str, Any]:
+        """جلب جميع الإعدادات بقيمها المحوّلة"""
+        cache = SettingController._load()
+        return {key: parse(cache[key]) for key, (parse, _) in SETTINGS_SCHEMA.items()}
+    
+    @staticmethod
+    def update_many(values: Dict[str, Any]) -> Dict:
+        """حفظ عدة إعدادات في معاملة واحدة مع تحديث الذاكرة المؤقتة"""
+        unknown = [key for key in values if key not in SETTINGS_SCHEMA]
+        if unknown:
+            return {"success": False, "message": f"إعدادات غير معروفة: {', '.join(unknown)}"}
+        
+        serialized = {key: SETTINGS_SCHEMA[key][1](value) for key, value in values.items()}
+        
+        with get_db(label="SettingController.update_many") as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO settings (key, value, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            """, list(serialized.items()))
+            SettingController._bump_version(conn)
+        SettingController.invalidate()
+        
+        settings = {key: SETTINGS_SCHEMA[key][0](value) for key, value in serialized.items()}
+        publish("setting_changed", settings=settings)
+        return {
+            "success": True,
+            "message": "تم حفظ الإعدادات بنجاح",
+            "settings": settings
+        }
+    
+    @staticmethod
+    def _delete(key: str):
+        """حذف مفتاح من قاعدة البيانات والذاكرة المؤقتة"""
+        with get_db(label="SettingController._delete") as conn:
+            conn.execute("DELETE FROM settings WHERE key = ?", (key,))
+            SettingController._bump_version(conn)
+        SettingController.invalidate()
+        publish("setting_changed", settings={key: SETTINGS_SCHEMA[key][0](None)})
+    
     @staticmethod
     def get_title() -> Dict:
         """جلب عنوان العجلة"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT value FROM settings WHERE key = 'wheel_title'")
-        result = cursor.fetchone()
-        conn.close()
-        
-        title = result[0] if result else ""
+        result = SettingController._get("wheel_title")
         return {
             "success": True,
-            "title": title,
-            "exists": bool(result)
+            "title": result["value"],
+            "exists": result["exists"]
         }
     
     @staticmethod
     def set_title(title: str) -> Dict:
         """حفظ عنوان العجلة"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        title_text = title.strip()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO settings (key, value, updated_at)
-            VALUES ('wheel_title', ?, CURRENT_TIMESTAMP)
-        """, (title_text,))
-        
-        conn.commit()
-        conn.close()
-        
+        result = SettingController.update_many({"wheel_title": title})
         return {
             "success": True,
             "message": "تم حفظ العنوان بنجاح",
-            "title": title_text
+            "title": result["settings"]["wheel_title"]
         }
     
     @staticmethod
     def delete_title() -> Dict:
         """حذف عنوان العجلة"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM settings WHERE key = 'wheel_title'")
-        conn.commit()
-        conn.close()
-        
+        SettingController._delete("wheel_title")
         return {
             "success": True,
             "message": "تم حذف العنوان بنجاح"
@@ -63,119 +144,59 @@ class SettingController:
     @staticmethod
     def get_text_color() -> Dict:
         """جلب لون النص"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT value FROM settings WHERE key = 'text_color'")
-        result = cursor.fetchone()
-        conn.close()
-        
-        color = result[0] if result else "#333333"  # افتراضي داكن للنص
+        result = SettingController._get("text_color")
         return {
             "success": True,
-            "color": color,
-            "exists": bool(result)
+            "color": result["value"],
+            "exists": result["exists"]
         }
     
     @staticmethod
     def set_text_color(color: str) -> Dict:
         """حفظ لون النص"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        color_text = color.strip()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO settings (key, value, updated_at)
-            VALUES ('text_color', ?, CURRENT_TIMESTAMP)
-        """, (color_text,))
-        
-        conn.commit()
-        conn.close()
-        
+        result = SettingController.update_many({"text_color": color})
         return {
             "success": True,
             "message": "تم حفظ لون النص بنجاح",
-            "color": color_text
+            "color": result["settings"]["text_color"]
         }
     
     @staticmethod
     def get_max_display_names() -> Dict:
         """جلب الحد الأقصى للأسماء الظاهرة"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT value FROM settings WHERE key = 'max_display_names'")
-        result = cursor.fetchone()
-        conn.close()
-        
-        max_names = int(result[0]) if result and result[0].isdigit() else 0  # 0 يعني بدون حد
+        result = SettingController._get("max_display_names")
         return {
             "success": True,
-            "max_names": max_names,
-            "exists": bool(result)
+            "max_names": result["value"],
+            "exists": result["exists"]
         }
     
     @staticmethod
     def set_max_display_names(max_names: int) -> Dict:
         """حفظ الحد الأقصى للأسماء الظاهرة"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # التأكد من أن القيمة صحيحة
-        max_names_value = max(0, int(max_names))  # على الأقل 0 (بدون حد)
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO settings (key, value, updated_at)
-            VALUES ('max_display_names', ?, CURRENT_TIMESTAMP)
-        """, (str(max_names_value),))
-        
-        conn.commit()
-        conn.close()
-        
+        result = SettingController.update_many({"max_display_names": max_names})
         return {
             "success": True,
             "message": "تم حفظ الحد الأقصى للأسماء بنجاح",
-            "max_names": max_names_value
+            "max_names": result["settings"]["max_display_names"]
         }
     
     @staticmethod
     def get_sound_muted() -> Dict:
         """جلب حالة كتم الصوت"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT value FROM settings WHERE key = 'sound_muted'")
-        result = cursor.fetchone()
-        conn.close()
-        
-        # افتراضي: الصوت غير مكتوم (false)
-        is_muted = result[0].lower() == 'true' if result else False
+        result = SettingController._get("sound_muted")
         return {
             "success": True,
-            "muted": is_muted,
-            "exists": bool(result)
+            "muted": result["value"],
+            "exists": result["exists"]
         }
     
     @staticmethod
     def set_sound_muted(muted: bool) -> Dict:
         """حفظ حالة كتم الصوت"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        muted_value = str(muted).lower()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO settings (key, value, updated_at)
-            VALUES ('sound_muted', ?, CURRENT_TIMESTAMP)
-        """, (muted_value,))
-        
-        conn.commit()
-        conn.close()
-        
+        result = SettingController.update_many({"sound_muted": muted})
         return {
             "success": True,
             "message": "تم حفظ حالة الصوت بنجاح",
-            "muted": muted
+            "muted": result["settings"]["sound_muted"]
         }
-
@@ -0,0 +1,37 @@
+"""متحكم حالة العجلة الكاملة"""
+from typing import Dict
+from database.db import get_db
+from controllers.participant_controller import ParticipantController
+from controllers.winner_controller import WinnerController
+from controllers.setting_controller import SettingController
+from controllers.upload_controller import UploadController
+
+
+class StateController:
+    """متحكم تجميع حالة العجلة في استجابة واحدة"""
+    
+    @staticmethod
+    def get_state() -> Dict:
+        """جلب المشاركين والفائزين والإعدادات والصورة دفعة واحدة"""
+        # جميع الاستعلامات ضمن معاملة قراءة واحدة لضمان حالة متسقة
+        with get_db(snapshot=True, label="StateController.get_state"):
+            participants = ParticipantController.get_all()
+            winners = WinnerController.get_all()
+            # نسخة الإعدادات تُقرأ في نفس المعاملة (والقيم من الذاكرة إن لم تتغير)
+            settings = SettingController.get_all()
+        
+        # الصورة من مجلد الرفع
+        wheel_image = UploadController.get_wheel_image()
+        
+        return {
+            "participants": participants,
+            "participants_count": len(participants),
+            "winners": winners,
+            "winners_count": len(winners),
+            "wheel_image": {
+                "url": wheel_image["url"],
+                "variants": wheel_image["variants"],
+                "exists": wheel_image["exists"]
+            },
+            "settings": settings
+        }
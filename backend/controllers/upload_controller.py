@@ -1,17 +1,111 @@
 """متحكم رفع الملفات"""
-import shutil
+import hashlib
+import json
+import mimetypes
+import os
+from importlib.util import find_spec
+from io import BytesIO
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 from fastapi import UploadFile
-from config.config import UPLOAD_DIR
+from config.config import MAX_IMAGE_UPLOAD_BYTES, WHEEL_IMAGE_SIZES, UPLOAD_HASH_LENGTH
+from database.wheels import current_wheel, upload_dir, upload_url
+from events.broker import publish
+
+# Pillow يُحمَّل عند أول رفع صورة فقط
+IMAGE_PROCESSING = find_spec("PIL") is not None
+if not IMAGE_PROCESSING:
+    print("تحذير: مكتبة Pillow غير مثبتة. سيتم حفظ صورة العجلة بدون تصغير.")
+
+
+# ملف يصف الصورة الحالية ونسخها المصغرة
+MANIFEST_FILE = "wheel_center.json"
+
+# اسم الصورة قبل استخدام البصمة (للصور المرفوعة سابقاً)
+LEGACY_IMAGE_FILE = "wheel_center.png"
+
+# حجم القراءة من الملف المرفوع
+UPLOAD_READ_CHUNK = 256 * 1024
 
 
 class UploadController:
     """متحكم عمليات رفع الملفات"""
     
+    @staticmethod
+    def _read_capped(file: UploadFile) -> Optional[bytes]:
+        """قراءة الملف المرفوع على دفعات، أو None إذا تجاوز الحد الأقصى"""
+        buffer = BytesIO()
+        while True:
+            chunk = file.file.read(UPLOAD_READ_CHUNK)
+            if not chunk:
+                return buffer.getvalue()
+            if buffer.tell() + len(chunk) > MAX_IMAGE_UPLOAD_BYTES:
+                return None
+            buffer.write(chunk)
+    
+    @staticmethod
+    def _dir(create: bool = False) -> Path:
+        """مجلد صور العجلة الحالية (create=True عند الكتابة فقط)"""
+        return upload_dir(current_wheel.get(), create)
+    
+    @staticmethod
+    def _url(file_name: str) -> str:
+        """رابط ملف في مجلد صور العجلة الحالية"""
+        return upload_url(current_wheel.get(), file_name)
+    
+    @staticmethod
+    def _content_hash(data: bytes) -> str:
+        """بصمة المحتوى المستخدمة في أسماء الملفات"""
+        return hashlib.sha256(data).hexdigest()[:UPLOAD_HASH_LENGTH]
+    
+    @staticmethod
+    def _write_variants(data: bytes, digest: str) -> Dict:
+        """فك الصورة مرة واحدة وإنشاء نسخ بأحجام العرض بصيغتي WebP و PNG"""
+        from PIL import Image, ImageOps
+        with Image.open(BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA")
+        
+        directory = UploadController._dir(create=True)
+        variants = {}
+        # من الأكبر إلى الأصغر حتى يُصغَّر كل حجم من الحجم الذي قبله
+        for size in sorted(WHEEL_IMAGE_SIZES, reverse=True):
+            if max(image.size) > size:
+                image.thumbnail((size, size), Image.LANCZOS)
+            webp_name = f"wheel_center_{size}.{digest}.webp"
+            png_name = f"wheel_center_{size}.{digest}.png"
+            image.save(directory / webp_name, "WEBP", quality=85, method=4)
+            image.save(directory / png_name, "PNG", optimize=True)
+            variants[str(size)] = {"webp": UploadController._url(webp_name), "png": UploadController._url(png_name)}
+        return variants
+    
+    @staticmethod
+    def _read_manifest() -> Optional[Dict]:
+        """قراءة وصف الصورة الحالية إن وُجد"""
+        manifest_path = UploadController._dir() / MANIFEST_FILE
+        try:
+            return json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def _write_manifest(manifest: Dict):
+        """كتابة الوصف بشكل ذري حتى لا يُقرأ ملف ناقص"""
+        manifest_path = UploadController._dir() / MANIFEST_FILE
+        temp_path = manifest_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(temp_path, manifest_path)
+    
+    @staticmethod
+    def _remove_files(keep: frozenset = frozenset()):
+        """حذف ملفات صورة العجلة ما عدا المذكورة في keep"""
+        for path in UploadController._dir().glob("wheel_center*"):
+            if path.name != MANIFEST_FILE and path.name not in keep:
+                path.unlink(missing_ok=True)
+    
     @staticmethod
     def upload_wheel_image(file: UploadFile) -> Dict:
-        """رفع صورة للعجلة"""
+        """رفع صورة للعجلة وإنشاء نسخ مصغرة منها"""
         try:
             # التحقق من نوع الملف
             if not file.content_type or not file.content_type.startswith('image/'):
@@ -20,15 +114,49 @@ class UploadController:
                     "message": "يجب أن يكون الملف صورة"
                 }
             
-            # حفظ الملف
-            file_path = UPLOAD_DIR / "wheel_center.png"
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            data = UploadController._read_capped(file)
+            if data is None:
+                return {
+                    "success": False,
+                    "message": f"حجم الصورة أكبر من الحد المسموح ({MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)}MB)"
+                }
+            
+            # اسم الملف يتغير مع المحتوى فيمكن تخزين الرابط مؤقتاً بلا انتهاء
+            digest = UploadController._content_hash(data)
+            variants = {}
+            if IMAGE_PROCESSING:
+                from PIL import Image
+                try:
+                    variants = UploadController._write_variants(data, digest)
+                except (OSError, ValueError, Image.DecompressionBombError):
+                    return {
+                        "success": False,
+                        "message": "تعذر قراءة الصورة"
+                    }
+                # الرابط الرئيسي يشير إلى أكبر نسخة PNG
+                url = variants[str(max(WHEEL_IMAGE_SIZES))]["png"]
+            else:
+                # حفظ الملف كما هو
+                extension = mimetypes.guess_extension(file.content_type) or ".png"
+                file_name = f"wheel_center.{digest}{extension}"
+                (UploadController._dir(create=True) / file_name).write_bytes(data)
+                url = UploadController._url(file_name)
+            
+            manifest = {"url": url, "variants": variants}
+            UploadController._write_manifest(manifest)
+            
+            # حذف نسخ الصورة السابقة بعد أن أصبح الوصف يشير إلى الجديدة
+            keep = {url.rsplit("/", 1)[-1]}
+            for formats in variants.values():
+                keep.update(link.rsplit("/", 1)[-1] for link in formats.values())
+            UploadController._remove_files(frozenset(keep))
+            
+            publish("wheel_image_changed", exists=True, **manifest)
             
             return {
                 "success": True,
                 "message": "تم رفع الصورة بنجاح",
-                "url": "/uploads/wheel_center.png"
+                **manifest
             }
         except Exception as e:
             return {
@@ -38,26 +166,41 @@ class UploadController:
     
     @staticmethod
     def get_wheel_image() -> Dict:
-        """الحصول على رابط صورة العجلة"""
-        file_path = UPLOAD_DIR / "wheel_center.png"
+        """الحصول على رابط صورة العجلة ونسخها المصغرة"""
+        manifest = UploadController._read_manifest()
+        if manifest:
+            return {
+                "success": True,
+                "url": manifest["url"],
+                "variants": manifest["variants"],
+                "exists": True
+            }
+        # صورة مرفوعة قبل إضافة النسخ المصغرة
+        file_path = UploadController._dir() / LEGACY_IMAGE_FILE
         if file_path.exists():
             return {
                 "success": True,
-                "url": "/uploads/wheel_center.png",
+                "url": UploadController._url(LEGACY_IMAGE_FILE),
+                "variants": {},
                 "exists": True
             }
         return {
             "success": True,
             "url": None,
+            "variants": {},
             "exists": False
         }
     
     @staticmethod
     def delete_wheel_image() -> Dict:
-        """حذف صورة العجلة"""
-        file_path = UPLOAD_DIR / "wheel_center.png"
-        if file_path.exists():
-            file_path.unlink()
+        """حذف صورة العجلة ونسخها المصغرة"""
+        directory = UploadController._dir()
+        manifest_path = directory / MANIFEST_FILE
+        if manifest_path.exists() or (directory / LEGACY_IMAGE_FILE).exists():
+            # حذف الوصف أولاً حتى لا يشير إلى ملفات محذوفة
+            manifest_path.unlink(missing_ok=True)
+            UploadController._remove_files()
+            publish("wheel_image_changed", url=None, variants={}, exists=False)
             return {
                 "success": True,
                 "message": "تم حذف الصورة بنجاح"
@@ -66,4 +209,3 @@ class UploadController:
             "success": False,
             "message": "الصورة غير موجودة"
         }
-
@@ -1,6 +1,11 @@
 """متحكم عجلة الحظ"""
-import secrets  # استخدام secrets للعشوائية الآمنة بدلاً من random
-from typing import Dict
+import json
+import sqlite3
+from typing import Dict, Optional
+from config.config import IDEMPOTENCY_KEY_TTL_HOURS
+from database.db import get_db
+from events.broker import publish
+from metrics.registry import SPINS, WINNERS_DRAWN
 from controllers.participant_controller import ParticipantController
 from controllers.winner_controller import WinnerController
 
@@ -9,33 +14,140 @@ class WheelController:
     """متحكم عمليات تدوير العجلة"""
     
     @staticmethod
-    def spin() -> Dict:
-        """تدوير العجلة واختيار فائز باستخدام عشوائية آمنة"""
-        participants = ParticipantController.get_all()
-        
-        if not participants:
+    def _replay(conn: sqlite3.Connection, key: str, operation: str) -> Optional[Dict]:
+        """النتيجة المحفوظة لمفتاح Idempotency-Key إن وُجدت"""
+        row = conn.execute("""
+            SELECT operation, response FROM idempotency_keys
+            WHERE key = ? AND created_at >= datetime('now', ?)
+        """, (key, f"-{IDEMPOTENCY_KEY_TTL_HOURS} hours")).fetchone()
+        if row is None:
+            return None
+        if row[0] != operation:
             return {
                 "success": False,
-                "message": "لا يوجد مشاركون في العجلة"
+                "key_reused": True,
+                "message": "مفتاح Idempotency-Key مستخدم لعملية أخرى"
             }
+        return {**json.loads(row[1]), "replayed": True}
+    
+    @staticmethod
+    def _remember(conn: sqlite3.Connection, key: str, operation: str, result: Dict):
+        """حفظ النتيجة مع المفتاح في نفس معاملة السحب وحذف المفاتيح المنتهية"""
+        conn.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < datetime('now', ?)",
+            (f"-{IDEMPOTENCY_KEY_TTL_HOURS} hours",)
+        )
+        conn.execute(
+            "INSERT INTO idempotency_keys (key, operation, response) VALUES (?, ?, ?)",
+            (key, operation, json.dumps(result, ensure_ascii=False))
+        )
+    
+    @staticmethod
+    def spin(idempotency_key: Optional[str] = None) -> Dict:
+        """
+        تدوير العجلة واختيار فائز باستخدام عشوائية آمنة
         
-        # اختيار فائز عشوائي آمن (cryptographically secure)
-        # مثل wheelofnames.com الذي يستخدم crypto.getRandomValues()
-        winner = secrets.choice(participants)
+        الاختيار والحذف والإضافة في معاملة BEGIN IMMEDIATE واحدة، فلا يمكن لعمليتين
+        (حتى من workers مختلفة) سحب نفس المشارك. عند تكرار نفس idempotency_key
+        تُرجع النتيجة الأصلية دون سحب فائز جديد.
+        """
+        ParticipantController.prepare_weighted_pool()
+        with get_db(immediate=True, label="WheelController.spin") as conn:
+            if idempotency_key:
+                stored = WheelController._replay(conn, idempotency_key, "spin")
+                if stored is not None:
+                    return stored
+            
+            total = ParticipantController.count()
+            
+            # اختيار فائز عشوائي آمن (cryptographically secure)
+            # مثل wheelofnames.com الذي يستخدم crypto.getRandomValues()
+            picked = ParticipantController.pick(total)
+            
+            if picked is None:
+                return {
+                    "success": False,
+                    "message": "لا يوجد مشاركون في العجلة"
+                }
+            
+            # حذف الفائز من قائمة المشاركين (الاسم يُؤخذ من الصف المحذوف نفسه)
+            winner = ParticipantController.remove_by_id(picked[0])
+            
+            # إضافة الفائز إلى قائمة الفائزين
+            won_at = WinnerController.add(winner)["won_at"]
+            
+            # حساب العدد المتبقي
+            remaining_count = total - 1
+            
+            result = {
+                "success": True,
+                "winner": winner,
+                "remaining_count": remaining_count,
+                "message": f"مبروك! الفائز هو: {winner}"
+            }
+            if idempotency_key:
+                WheelController._remember(conn, idempotency_key, "spin", result)
         
-        # حذف الفائز من قائمة المشاركين
-        ParticipantController.remove(winner)
+        publish("winner_drawn", winner=winner, won_at=won_at, remaining_count=remaining_count)
+        SPINS.labels("single").inc()
+        WINNERS_DRAWN.inc()
         
-        # إضافة الفائز إلى قائمة الفائزين
-        WinnerController.add(winner)
+        return result
+    
+    @staticmethod
+    def spin_batch(count: int, idempotency_key: Optional[str] = None) -> Dict:
+        """سحب عدة فائزين مختلفين (بدون إرجاع) في معاملة واحدة"""
+        winners = []
+        ParticipantController.prepare_weighted_pool()
+        with get_db(immediate=True, label="WheelController.spin_batch") as conn:
+            if idempotency_key:
+                stored = WheelController._replay(conn, idempotency_key, "spin_batch")
+                if stored is not None:
+                    return stored
+            
+            total = ParticipantController.count()
+            
+            if total == 0:
+                return {
+                    "success": False,
+                    "message": "لا يوجد مشاركون في العجلة"
+                }
+            
+            # نوع السحب وحدود المعرّفات يُحسبان مرة واحدة لكل الدفعة
+            weighted = ParticipantController.has_weights()
+            pool = ParticipantController.weighted_pool() if weighted else None
+            bounds = None if weighted else ParticipantController.id_bounds()
+            
+            # كل فائز يُحذف فوراً فلا يمكن سحبه مرة أخرى
+            remaining_count = total
+            for _ in range(min(count, total)):
+                if weighted:
+                    # الحذف يُستبعد من الجدول نفسه، ويُعاد بناؤه فقط إذا كثر المسحوبون
+                    if pool is not None and pool.stale():
+                        pool = ParticipantController.weighted_pool()
+                    picked = pool.sample() if pool is not None else None
+                else:
+                    picked = ParticipantController.pick_random(remaining_count, bounds)
+                if picked is None:
+                    break
+                winners.append(ParticipantController.remove_by_id(picked[0]))
+                remaining_count -= 1
+            
+            # إضافة الفائزين بنفس ترتيب السحب
+            won_at = WinnerController.add_many(winners)["won_at"]
+            
+            result = {
+                "success": True,
+                "winners": winners,
+                "count": len(winners),
+                "remaining_count": remaining_count,
+                "message": f"تم سحب {len(winners)} فائز"
+            }
+            if idempotency_key:
+                WheelController._remember(conn, idempotency_key, "spin_batch", result)
         
-        # حساب العدد المتبقي
-        remaining_count = ParticipantController.count()
+        publish("winners_drawn", winners=winners, won_at=won_at, remaining_count=remaining_count)
+        SPINS.labels("batch").inc()
+        WINNERS_DRAWN.inc(len(winners))
         
-        return {
-            "success": True,
-            "winner": winner,
-            "remaining_count": remaining_count,
-            "message": f"مبروك! الفائز هو: {winner}"
-        }
-
+        return result
@@ -1,265 +1,193 @@
 """متحكم الفائزين"""
-from typing import List, Dict
-from io import BytesIO
-from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfdoc
 import os
-try:
-    import arabic_reshaper
-    from bidi.algorithm import get_display
-    ARABIC_SUPPORT = True
-except ImportError:
-    ARABIC_SUPPORT = False
-    print("تحذير: مكتبات دعم العربية غير مثبتة. سيتم عرض النص العربي بدون تشكيل.")
-from database.db import get_db_connection
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, List, Dict, Optional, Tuple
+from io import BytesIO
+from datetime import datetime, timezone
+from config.config import PDF_CACHE_MAX_BYTES, PDF_CACHE_MAX_WHEELS
+from database.db import get_db
+from database.wheels import current_wheel
+from database.pagination import encode_cursor, decode_cursor
+from events.broker import publish
+from metrics.registry import PDF_RENDER_DURATION, PDF_REQUESTS, PDF_SIZE
 
 
 class WinnerController:
     """متحكم عمليات الفائزين"""
     
-    @staticmethod
-    def _reshape_arabic_text(text: str) -> str:
-        """تحويل النص العربي لعرضه بشكل صحيح في PDF"""
-        if not ARABIC_SUPPORT:
-            return text
-        try:
-            # إعادة تشكيل النص العربي
-            reshaped_text = arabic_reshaper.reshape(text)
-            # تحويل الاتجاه من اليمين لليسار
-            bidi_text = get_display(reshaped_text)
-            return bidi_text
-        except Exception as e:
-            # في حالة الخطأ، إرجاع النص الأصلي
-            print(f"تحذير: خطأ في تحويل النص العربي: {e}")
-            return text
+    # آخر PDF لكل عجلة مع نسخة جدول الفائزين التي بُني منها (الأحدث استخداماً في النهاية)
+    _pdf_cache: "OrderedDict[str, Tuple[Tuple, bytes]]" = OrderedDict()
+    _pdf_lock = threading.Lock()
     
     @staticmethod
     def get_all() -> List[Dict]:
         """الحصول على قائمة جميع الفائزين"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, won_at FROM winners ORDER BY won_at DESC")
-        winners = [{"name": row[0], "won_at": row[1]} for row in cursor.fetchall()]
-        conn.close()
+        with get_db(label="WinnerController.get_all") as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, won_at FROM winners ORDER BY won_at DESC, id DESC")
+            winners = [{"name": row[0], "won_at": row[1]} for row in cursor.fetchall()]
         return winners
     
+    @staticmethod
+    def _db_time(value: datetime) -> str:
+        """تحويل الوقت إلى صيغة CURRENT_TIMESTAMP المخزنة (UTC)"""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    
+    @staticmethod
+    def get_page(
+        limit: int,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ) -> Dict:
+        """
+        الحصول على صفحة من الفائزين (من الأحدث إلى الأقدم) باستخدام مؤشر
+
+        since/until تحدد فترة الفوز، و after_id يجلب فقط من فاز بعد معرّف معيّن.
+        مع after_id يكون الترتيب حسب المعرّف (بنفس ترتيب السحب) حتى يقرأ SQLite
+        الصفوف الجديدة فقط عبر المفتاح الأساسي بدلاً من المرور على فهرس الوقت.
+        """
+        try:
+            before = decode_cursor(cursor, 2)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("won_at >= ?")
+            params.append(WinnerController._db_time(since))
+        if until is not None:
+            conditions.append("won_at < ?")
+            params.append(WinnerController._db_time(until))
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        if before is not None and after_id is not None:
+            conditions.append("id < ?")
+            params.append(before[1])
+        
+        with get_db(label="WinnerController.get_page") as conn:
+            if before is not None and after_id is None:
+                # السحب المتعدد يعطي جميع فائزيه نفس won_at، و SQLite لا يستخدم إلا won_at
+                # من مقارنة (won_at, id) في الفهرس، فيُقسم الشرط إلى بحثين على الفهرس
+                same = " AND ".join(conditions + ["won_at = ?", "id < ?"])
+                older = " AND ".join(conditions + ["won_at < ?"])
+                rows = conn.execute(f"""
+                    SELECT id, name, won_at FROM (
+                        SELECT * FROM (
+                            SELECT id, name, won_at FROM winners WHERE {same}
+                            ORDER BY id DESC LIMIT ?
+                        )
+                        UNION ALL
+                        SELECT * FROM (
+                            SELECT id, name, won_at FROM winners WHERE {older}
+                            ORDER BY won_at DESC, id DESC LIMIT ?
+                        )
+                    )
+                    ORDER BY won_at DESC, id DESC LIMIT ?
+                """, (
+                    *params, before[0], before[1], limit + 1,
+                    *params, before[0], limit + 1,
+                    limit + 1
+                )).fetchall()
+            else:
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                order = "id DESC" if after_id is not None else "won_at DESC, id DESC"
+                rows = conn.execute(f"""
+                    SELECT id, name, won_at FROM winners {where}
+                    ORDER BY {order} LIMIT ?
+                """, (*params, limit + 1)).fetchall()
+        
+        # جلب صف إضافي لمعرفة وجود صفحة تالية
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][2], rows[-1][0]]) if has_more else None
+        return {
+            "success": True,
+            "winners": [{"id": row[0], "name": row[1], "won_at": row[2]} for row in rows],
+            "next_cursor": next_cursor
+        }
+    
+    @staticmethod
+    def invalidate_pdf():
+        """إبطال ملف PDF المخزن بعد تغيّر قائمة الفائزين"""
+        with WinnerController._pdf_lock:
+            WinnerController._pdf_cache.pop(current_wheel.get(), None)
+    
+    @staticmethod
+    def _version() -> Tuple:
+        """نسخة جدول الفائزين: العدد وآخر معرّف (المعرّفات لا يُعاد استخدامها)"""
+        with get_db(label="WinnerController._version") as conn:
+            return tuple(conn.execute("SELECT COUNT(*), MAX(id) FROM winners").fetchone())
+    
     @staticmethod
     def add(name: str) -> Dict:
         """إضافة فائز"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO winners (name) VALUES (?)", (name,))
-        conn.commit()
-        conn.close()
-        return {"success": True, "message": "تم إضافة الفائز"}
+        WinnerController.invalidate_pdf()
+        with get_db(label="WinnerController.add") as conn:
+            won_at = conn.execute(
+                "INSERT INTO winners (name) VALUES (?) RETURNING won_at", (name,)
+            ).fetchone()[0]
+        return {"success": True, "message": "تم إضافة الفائز", "won_at": won_at}
+    
+    @staticmethod
+    def add_many(names: List[str]) -> Dict:
+        """إضافة عدة فائزين بترتيب السحب"""
+        WinnerController.invalidate_pdf()
+        with get_db(label="WinnerController.add_many") as conn:
+            # وقت واحد لجميع فائزي السحب نفسه
+            won_at = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO winners (name, won_at) VALUES (?, ?)", [(name, won_at) for name in names]
+            )
+        return {"success": True, "message": f"تم إضافة {len(names)} فائز", "won_at": won_at}
     
     @staticmethod
     def clear_all() -> Dict:
         """مسح قائمة الفائزين"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM winners")
-        conn.commit()
-        conn.close()
+        WinnerController.invalidate_pdf()
+        with get_db(label="WinnerController.clear_all") as conn:
+            conn.execute("DELETE FROM winners")
+        publish("winners_cleared")
         return {"success": True, "message": "تم مسح قائمة الفائزين"}
     
     @staticmethod
-    def generate_pdf() -> BytesIO:
-        """إنشاء ملف PDF لقائمة الفائزين"""
-        try:
-            # الحصول على قائمة الفائزين
-            winners = WinnerController.get_all()
-            
-            # إنشاء buffer للـ PDF
-            buffer = BytesIO()
-            
-            # إنشاء مستند PDF مع اتجاه RTL (من اليمين إلى اليسار)
-            # تبديل الهوامش: اليمين يصبح يسار والعكس
-            doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-            
-            # إنشاء محتوى المستند
-            story = []
-            
-            # إنشاء الأنماط
-            styles = getSampleStyleSheet()
-            
-            # استخدام خط يدعم Unicode والعربية
-            # محاولة استخدام Arial Unicode MS أو خطات أخرى تدعم Unicode
-            font_name = 'Helvetica'  # الخط الافتراضي
-            
-            # محاولة تسجيل خط عربي إذا كان متاحاً
-            font_is_custom = False
-            try:
-                # محاولة استخدام Arial Unicode MS إذا كان متاحاً في النظام
-                if os.path.exists('C:/Windows/Fonts/arialuni.ttf'):
-                    pdfmetrics.registerFont(TTFont('ArialUnicode', 'C:/Windows/Fonts/arialuni.ttf'))
-                    font_name = 'ArialUnicode'
-                    font_is_custom = True
-                elif os.path.exists('C:/Windows/Fonts/ARIALUNI.TTF'):
-                    pdfmetrics.registerFont(TTFont('ArialUnicode', 'C:/Windows/Fonts/ARIALUNI.TTF'))
-                    font_name = 'ArialUnicode'
-                    font_is_custom = True
-            except Exception as e:
-                # إذا فشل، نستخدم الخط الافتراضي
-                print(f"تحذير: لم يتم العثور على خط Unicode، سيتم استخدام الخط الافتراضي: {e}")
-            
-            # إنشاء الأنماط مع الخط المناسب
-            # إذا كان الخط مخصصاً، نستخدمه مباشرة بدون إضافة -Bold
-            # لأن الخطوط المخصصة لا تدعم -Bold تلقائياً
-            if font_is_custom:
-                title_font = font_name
-                heading_font = font_name
-            else:
-                title_font = 'Helvetica-Bold'
-                heading_font = 'Helvetica-Bold'
-            
-            # أنماط RTL (من اليمين إلى اليسار)
-            title_style = ParagraphStyle(
-                'ArabicTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#2c3e50'),
-                alignment=TA_CENTER,  # العنوان في المنتصف
-                fontName=title_font,
-                spaceAfter=30,
-                direction='rtl'  # اتجاه RTL
-            )
-            heading_style = ParagraphStyle(
-                'ArabicHeading',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor=colors.HexColor('#34495e'),
-                alignment=TA_CENTER,  # العنوان في المنتصف
-                fontName=heading_font,
-                spaceAfter=20,
-                direction='rtl'  # اتجاه RTL
-            )
-            normal_style = ParagraphStyle(
-                'ArabicNormal',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor=colors.HexColor('#2c3e50'),
-                alignment=TA_RIGHT,  # النص من اليمين
-                fontName=font_name,
-                spaceAfter=10,
-                direction='rtl'  # اتجاه RTL
-            )
-            
-            # العنوان الرئيسي
-            title_text = WinnerController._reshape_arabic_text("قائمة الفائزين 🏆")
-            title = Paragraph(title_text, title_style)
-            story.append(title)
-            story.append(Spacer(1, 0.5*cm))
-            
-            # التاريخ والوقت
-            now = datetime.now()
-            date_str = now.strftime("%Y-%m-%d %H:%M:%S")
-            date_text = WinnerController._reshape_arabic_text(f"تاريخ الطباعة: {date_str}")
-            date_para = Paragraph(date_text, normal_style)
-            story.append(date_para)
-            story.append(Spacer(1, 0.3*cm))
-            
-            # عدد الفائزين
-            count_text = WinnerController._reshape_arabic_text(f"إجمالي عدد الفائزين: {len(winners)}")
-            count_para = Paragraph(count_text, heading_style)
-            story.append(count_para)
-            story.append(Spacer(1, 0.5*cm))
-            
-            if len(winners) == 0:
-                # إذا لم يكن هناك فائزين
-                no_winners_text = WinnerController._reshape_arabic_text("لا يوجد فائزون بعد")
-                no_winners = Paragraph(no_winners_text, normal_style)
-                story.append(no_winners)
-            else:
-                # إنشاء جدول الفائزين
-                # بيانات الجدول
-                table_data = []
-                
-                # رأس الجدول - من اليمين إلى اليسار (RTL)
-                # ترتيب الأعمدة: تاريخ الفوز | اسم الفائز | الترتيب
-                header = [
-                    WinnerController._reshape_arabic_text('تاريخ الفوز'),
-                    WinnerController._reshape_arabic_text('اسم الفائز'),
-                    WinnerController._reshape_arabic_text('الترتيب')
-                ]
-                table_data.append(header)
-                
-                # بيانات الفائزين (مرتبة من الأحدث إلى الأقدم)
-                for index, winner in enumerate(winners, 1):
-                    # تنسيق التاريخ
-                    try:
-                        won_date = datetime.fromisoformat(winner['won_at'].replace('Z', '+00:00'))
-                        date_formatted = won_date.strftime("%Y-%m-%d %H:%M")
-                    except:
-                        date_formatted = str(winner['won_at'])
-                    
-                    # تحويل اسم الفائز العربي
-                    winner_name = WinnerController._reshape_arabic_text(winner['name'])
-                    
-                    # ترتيب الأعمدة من اليمين إلى اليسار: تاريخ | اسم | ترتيب
-                    row = [date_formatted, winner_name, str(index)]
-                    table_data.append(row)
-                
-                # إنشاء الجدول - عرض الأعمدة من اليمين إلى اليسار
-                table = Table(table_data, colWidths=[5*cm, 8*cm, 2*cm])
-                
-                # تنسيق الجدول
-                table.setStyle(TableStyle([
-                    # خلفية رأس الجدول
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), heading_font),
-                ('FONTSIZE', (0, 0), (-1, 0), 14),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('TOPPADDING', (0, 0), (-1, 0), 12),
-                    
-                    # تنسيق البيانات
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2c3e50')),
-                    ('FONTNAME', (0, 1), (-1, -1), font_name),
-                    ('FONTSIZE', (0, 1), (-1, -1), 11),
-                    # محاذاة الأعمدة من اليمين إلى اليسار: تاريخ | اسم | ترتيب
-                    ('ALIGN', (0, 1), (0, -1), 'CENTER'),   # عمود التاريخ (أول عمود من اليمين)
-                    ('ALIGN', (1, 1), (1, -1), 'RIGHT'),    # عمود الاسم (عربي) - محاذاة يمين
-                    ('ALIGN', (2, 1), (2, -1), 'CENTER'),   # عمود الترتيب (آخر عمود من اليسار)
-                    
-                    # خطوط الجدول
-                    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#95a5a6')),
-                    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#2980b9')),
-                    
-                    # تناوب الألوان للصفوف
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecf0f1')]),
-                    
-                    # تباعد
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                    ('TOPPADDING', (0, 1), (-1, -1), 8),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                ]))
-                
-                story.append(table)
-            
-            # بناء PDF
-            doc.build(story)
-            
-            # إعادة تعيين buffer للبداية
-            buffer.seek(0)
-            
-            return buffer
-        except Exception as e:
-            # طباعة الخطأ للمساعدة في التشخيص
-            import traceback
-            error_msg = f"خطأ في إنشاء PDF: {str(e)}\n{traceback.format_exc()}"
-            print(error_msg)
-            raise Exception(error_msg)
+    def generate_pdf() -> BinaryIO:
+        """
+        إنشاء ملف PDF لقائمة الفائزين (من الذاكرة المؤقتة إن لم تتغير القائمة)
 
+        يُرجع ملفاً ثنائياً مفتوحاً من بدايته، وعلى المستدعي إغلاقه.
+        """
+        wheel_id = current_wheel.get()
+        version = WinnerController._version()
+        with WinnerController._pdf_lock:
+            cached = WinnerController._pdf_cache.get(wheel_id)
+            if cached is not None and cached[0] == version:
+                WinnerController._pdf_cache.move_to_end(wheel_id)
+                PDF_REQUESTS.labels("hit").inc()
+                return BytesIO(cached[1])
+        
+        PDF_REQUESTS.labels("miss").inc()
+        started = time.perf_counter()
+        # reportlab ومكتبات التشكيل تُحمَّل عند أول طلب PDF فقط
+        from controllers.winners_pdf import render_pdf
+        output = render_pdf()
+        PDF_RENDER_DURATION.observe(time.perf_counter() - started)
+        # الملفات الكبيرة تبقى على القرص ولا تُخزن في الذاكرة
+        size = output.seek(0, os.SEEK_END)
+        PDF_SIZE.observe(size)
+        output.seek(0)
+        if size <= PDF_CACHE_MAX_BYTES:
+            with WinnerController._pdf_lock:
+                WinnerController._pdf_cache[wheel_id] = (version, output.read())
+                WinnerController._pdf_cache.move_to_end(wheel_id)
+                while len(WinnerController._pdf_cache) > PDF_CACHE_MAX_WHEELS:
+                    WinnerController._pdf_cache.popitem(last=False)
+            output.seek(0)
+        return output
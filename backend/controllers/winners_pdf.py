@@ -0,0 +1,264 @@
+"""إنشاء ملف PDF لقائمة الفائزين (يُحمَّل عند أول طلب PDF فقط)"""
+import itertools
+import os
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, Iterator
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from config.config import PDF_ROWS_PER_TABLE, PDF_SPOOL_MAX_BYTES
+from database.db import get_db
+from utils.arabic_text import shape, shape_many
+
+
+@lru_cache(maxsize=1)
+def _pdf_resources() -> Dict:
+    """تسجيل الخطوط وبناء أنماط PDF مرة واحدة لكل عملية"""
+    # إنشاء الأنماط
+    styles = getSampleStyleSheet()
+    
+    # استخدام خط يدعم Unicode والعربية
+    # محاولة استخدام Arial Unicode MS أو خطات أخرى تدعم Unicode
+    font_name = 'Helvetica'  # الخط الافتراضي
+    
+    # محاولة تسجيل خط عربي إذا كان متاحاً
+    font_is_custom = False
+    try:
+        # محاولة استخدام Arial Unicode MS إذا كان متاحاً في النظام
+        if os.path.exists('C:/Windows/Fonts/arialuni.ttf'):
+            pdfmetrics.registerFont(TTFont('ArialUnicode', 'C:/Windows/Fonts/arialuni.ttf'))
+            font_name = 'ArialUnicode'
+            font_is_custom = True
+        elif os.path.exists('C:/Windows/Fonts/ARIALUNI.TTF'):
+            pdfmetrics.registerFont(TTFont('ArialUnicode', 'C:/Windows/Fonts/ARIALUNI.TTF'))
+            font_name = 'ArialUnicode'
+            font_is_custom = True
+    except Exception as e:
+        # إذا فشل، نستخدم الخط الافتراضي
+        print(f"تحذير: لم يتم العثور على خط Unicode، سيتم استخدام الخط الافتراضي: {e}")
+    
+    # إنشاء الأنماط مع الخط المناسب
+    # إذا كان الخط مخصصاً، نستخدمه مباشرة بدون إضافة -Bold
+    # لأن الخطوط المخصصة لا تدعم -Bold تلقائياً
+    if font_is_custom:
+        title_font = font_name
+        heading_font = font_name
+    else:
+        title_font = 'Helvetica-Bold'
+        heading_font = 'Helvetica-Bold'
+    
+    # أنماط RTL (من اليمين إلى اليسار)
+    title_style = ParagraphStyle(
+        'ArabicTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2c3e50'),
+        alignment=TA_CENTER,  # العنوان في المنتصف
+        fontName=title_font,
+        spaceAfter=30,
+        direction='rtl'  # اتجاه RTL
+    )
+    heading_style = ParagraphStyle(
+        'ArabicHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#34495e'),
+        alignment=TA_CENTER,  # العنوان في المنتصف
+        fontName=heading_font,
+        spaceAfter=20,
+        direction='rtl'  # اتجاه RTL
+    )
+    normal_style = ParagraphStyle(
+        'ArabicNormal',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.HexColor('#2c3e50'),
+        alignment=TA_RIGHT,  # النص من اليمين
+        fontName=font_name,
+        spaceAfter=10,
+        direction='rtl'  # اتجاه RTL
+    )
+    
+    # تنسيق جدول الفائزين
+    table_style = TableStyle([
+        # خلفية رأس الجدول
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), heading_font),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+        
+        # تنسيق البيانات
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2c3e50')),
+        ('FONTNAME', (0, 1), (-1, -1), font_name),
+        ('FONTSIZE', (0, 1), (-1, -1), 11),
+        # محاذاة الأعمدة من اليمين إلى اليسار: تاريخ | اسم | ترتيب
+        ('ALIGN', (0, 1), (0, -1), 'CENTER'),   # عمود التاريخ (أول عمود من اليمين)
+        ('ALIGN', (1, 1), (1, -1), 'RIGHT'),    # عمود الاسم (عربي) - محاذاة يمين
+        ('ALIGN', (2, 1), (2, -1), 'CENTER'),   # عمود الترتيب (آخر عمود من اليسار)
+        
+        # خطوط الجدول
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#95a5a6')),
+        ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#2980b9')),
+        
+        # تناوب الألوان للصفوف
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecf0f1')]),
+        
+        # تباعد
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ])
+    
+    return {
+        "title_style": title_style,
+        "heading_style": heading_style,
+        "normal_style": normal_style,
+        "table_style": table_style
+    }
+
+
+class _LazyStory(list):
+    """
+    قائمة flowables تُملأ تدريجياً من مولّد
+
+    reportlab يستهلك القصة من أولها، فنبقي فيها بضعة عناصر فقط بدلاً من
+    بناء جميع الجداول مسبقاً.
+    """
+    
+    def __init__(self, source: Iterable, prefetch: int = 2):
+        super().__init__()
+        self._source = iter(source)
+        self._prefetch = prefetch
+    
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._prefetch:
+            item = next(self._source, None)
+            if item is None:
+                self._source = None
+                break
+            list.append(self, item)
+    
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+    
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def _format_date(won_at: str) -> str:
+    """تنسيق تاريخ الفوز"""
+    try:
+        won_date = datetime.fromisoformat(won_at.replace('Z', '+00:00'))
+        return won_date.strftime("%Y-%m-%d %H:%M")
+    except:
+        return str(won_at)
+
+
+def _iter_tables(cursor, table_style: TableStyle) -> Iterator[Table]:
+    """بناء جداول بحجم صفحة تقريباً من مؤشر قاعدة البيانات"""
+    # رأس الجدول - من اليمين إلى اليسار (RTL)
+    # ترتيب الأعمدة: تاريخ الفوز | اسم الفائز | الترتيب
+    header = [
+        shape('تاريخ الفوز'),
+        shape('اسم الفائز'),
+        shape('الترتيب')
+    ]
+    index = 0
+    while True:
+        rows = cursor.fetchmany(PDF_ROWS_PER_TABLE)
+        if not rows:
+            return
+        table_data = [header]
+        # تحويل أسماء الدفعة العربية في استدعاء واحد
+        names = shape_many(row[0] for row in rows)
+        for name, (_, won_at) in zip(names, rows):
+            index += 1
+            # ترتيب الأعمدة من اليمين إلى اليسار: تاريخ | اسم | ترتيب
+            table_data.append([_format_date(won_at), name, str(index)])
+        
+        # إنشاء الجدول - عرض الأعمدة من اليمين إلى اليسار
+        table = Table(table_data, colWidths=[5*cm, 8*cm, 2*cm], repeatRows=1)
+        table.setStyle(table_style)
+        yield table
+
+
+def render_pdf() -> BinaryIO:
+    """بناء ملف PDF لقائمة الفائزين صفحة بعد صفحة في ملف مؤقت"""
+    output = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES)
+    try:
+        # إنشاء مستند PDF مع اتجاه RTL (من اليمين إلى اليسار)
+        # تبديل الهوامش: اليمين يصبح يسار والعكس
+        doc = SimpleDocTemplate(output, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+        
+        # الخطوط والأنماط مبنية مرة واحدة لكل عملية
+        resources = _pdf_resources()
+        title_style = resources["title_style"]
+        heading_style = resources["heading_style"]
+        normal_style = resources["normal_style"]
+        
+        # قراءة الفائزين ضمن معاملة قراءة واحدة حتى يتطابق العدد مع الصفوف
+        with get_db(snapshot=True, label="render_pdf") as conn:
+            total = conn.execute("SELECT COUNT(*) FROM winners").fetchone()[0]
+            
+            # إنشاء محتوى المستند
+            story = []
+            
+            # العنوان الرئيسي
+            title_text = shape("قائمة الفائزين 🏆")
+            title = Paragraph(title_text, title_style)
+            story.append(title)
+            story.append(Spacer(1, 0.5*cm))
+            
+            # التاريخ والوقت
+            now = datetime.now()
+            date_str = now.strftime("%Y-%m-%d %H:%M:%S")
+            date_text = shape(f"تاريخ الطباعة: {date_str}")
+            date_para = Paragraph(date_text, normal_style)
+            story.append(date_para)
+            story.append(Spacer(1, 0.3*cm))
+            
+            # عدد الفائزين
+            count_text = shape(f"إجمالي عدد الفائزين: {total}")
+            count_para = Paragraph(count_text, heading_style)
+            story.append(count_para)
+            story.append(Spacer(1, 0.5*cm))
+            
+            if total == 0:
+                # إذا لم يكن هناك فائزين
+                no_winners_text = shape("لا يوجد فائزون بعد")
+                no_winners = Paragraph(no_winners_text, normal_style)
+                story.append(no_winners)
+                doc.build(story)
+            else:
+                # بيانات الفائزين (مرتبة من الأحدث إلى الأقدم)
+                cursor = conn.execute("SELECT name, won_at FROM winners ORDER BY won_at DESC, id DESC")
+                tables = _iter_tables(cursor, resources["table_style"])
+                # الجداول تُبنى عند الحاجة فقط أثناء تخطيط الصفحات
+                doc.build(_LazyStory(itertools.chain(story, tables)))
+        
+        # إعادة تعيين الملف للبداية
+        output.seek(0)
+        
+        return output
+    except Exception as e:
+        output.close()
+        # طباعة الخطأ للمساعدة في التشخيص
+        import traceback
+        error_msg = f"خطأ في إنشاء PDF: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)
+        raise Exception(error_msg)
@@ -1,46 +1,238 @@
 """إدارة قاعدة البيانات"""
 import sqlite3
-from config.config import DATABASE
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from config.config import DB_BUSY_TIMEOUT, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_MAX_OPEN_WHEELS, WHEELS_DIR
+from database.wheels import DEFAULT_WHEEL, current_wheel, database_path, mark_created
+from metrics.registry import DB_CONNECTIONS_OPEN, DB_CONNECTIONS_OPENED, DB_DURATION
 
 
-def get_db_connection():
-    """إنشاء اتصال بقاعدة البيانات"""
-    return sqlite3.connect(DATABASE)
+# اتصال قابل لإعادة الاستخدام لكل عجلة في كل خيط (thread)
+_local = threading.local()
 
+# العجلات التي أُنشئت جداولها في هذه العملية
+_initialized = set()
+_init_lock = threading.Lock()
 
-def init_db():
-    """تهيئة قاعدة البيانات"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # جدول الأسماء المتاحة
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS participants (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # جدول الفائزين
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS winners (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            won_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # جدول الإعدادات
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS settings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            key TEXT NOT NULL UNIQUE,
-            value TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+
+def get_db_connection(wheel_id: str = DEFAULT_WHEEL) -> sqlite3.Connection:
+    """
+    إنشاء اتصال جديد بقاعدة بيانات العجلة مع تطبيق إعدادات الأداء
     
-    conn.commit()
-    conn.close()
+    قواعد بيانات العجلات الأخرى تُفتح بوضع rw فلا يُنشئ أي طلب ملفاً جديداً،
+    والإنشاء يتم فقط عبر create_wheel.
+    """
+    if wheel_id == DEFAULT_WHEEL:
+        conn = sqlite3.connect(database_path(wheel_id), timeout=DB_BUSY_TIMEOUT)
+    else:
+        conn = sqlite3.connect(f"file:{database_path(wheel_id)}?mode=rw", timeout=DB_BUSY_TIMEOUT, uri=True)
+    cursor = conn.cursor()
+    # WAL يسمح بالقراءة أثناء الكتابة ويقلل تكلفة كل commit
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+    DB_CONNECTIONS_OPENED.inc()
+    DB_CONNECTIONS_OPEN.inc()
+    return conn
+
+
+def _thread_connections() -> OrderedDict:
+    """اتصالات الخيط الحالي مرتبة من الأقدم استخداماً إلى الأحدث"""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = OrderedDict()
+        _local.depth = {}
+    return conns
+
+
+def _evict(conns: OrderedDict):
+    """إغلاق أقدم الاتصالات استخداماً عند تجاوز الحد (ما عدا المستخدمة حالياً)"""
+    while len(conns) > DB_MAX_OPEN_WHEELS:
+        for wheel_id, conn in conns.items():
+            if _local.depth[wheel_id] == 0 and not conn.in_transaction:
+                break
+        else:
+            return
+        del conns[wheel_id]
+        del _local.depth[wheel_id]
+        conn.close()
+        DB_CONNECTIONS_OPEN.dec()
+
+
+def _thread_connection(wheel_id: str) -> sqlite3.Connection:
+    """الحصول على اتصال العجلة في الخيط الحالي (يُفتح عند أول استخدام)"""
+    conns = _thread_connections()
+    conn = conns.get(wheel_id)
+    if conn is not None:
+        conns.move_to_end(wheel_id)
+        return conn
+    conn = get_db_connection(wheel_id)
+    _ensure_schema(wheel_id, conn)
+    conns[wheel_id] = conn
+    _local.depth[wheel_id] = 0
+    _evict(conns)
+    return conn
+
+
+@contextmanager
+def get_db(immediate: bool = False, snapshot: bool = False, label: str = "other"):
+    """
+    إعطاء اتصال من المخزن مع إدارة المعاملة
+
+    يتم الـ commit عند الخروج بنجاح والـ rollback عند حدوث خطأ.
+    الاستخدام المتداخل يشارك نفس المعاملة ولا يُنهيها إلا المستوى الخارجي.
+    immediate=True يبدأ المعاملة بـ BEGIN IMMEDIATE لحجز قفل الكتابة من البداية.
+    snapshot=True يبدأ معاملة قراءة حتى ترى جميع الاستعلامات نفس الحالة.
+    label اسم الدالة المستدعية في مقياس db_transaction_duration_seconds.
+    """
+    started = time.perf_counter()
+    wheel_id = current_wheel.get()
+    conn = _thread_connection(wheel_id)
+    depth = _local.depth
+    if depth[wheel_id] == 0 and not conn.in_transaction:
+        if immediate:
+            conn.execute("BEGIN IMMEDIATE")
+        elif snapshot:
+            conn.execute("BEGIN")
+    depth[wheel_id] += 1
+    try:
+        yield conn
+        if depth[wheel_id] == 1:
+            conn.commit()
+    except BaseException:
+        if depth[wheel_id] == 1:
+            conn.rollback()
+        raise
+    finally:
+        depth[wheel_id] -= 1
+        DB_DURATION.labels(label).observe(time.perf_counter() - started)
+
+
+def close_db():
+    """إغلاق جميع اتصالات الخيط الحالي"""
+    conns = getattr(_local, "conns", None)
+    if conns:
+        for conn in conns.values():
+            conn.close()
+        DB_CONNECTIONS_OPEN.dec(len(conns))
+        conns.clear()
+        _local.depth.clear()
+
+
+def _ensure_schema(wheel_id: str, conn: sqlite3.Connection):
+    """إنشاء جداول العجلة مرة واحدة عند أول فتح لها"""
+    if wheel_id in _initialized:
+        return
+    with _init_lock:
+        if wheel_id not in _initialized:
+            _create_schema(conn)
+            _initialized.add(wheel_id)
+
+
+def _create_schema(conn: sqlite3.Connection):
+    """إنشاء الجداول والفهارس"""
+    with conn:
+        cursor = conn.cursor()
+
+        # جدول الأسماء المتاحة
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS participants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                weight INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+
+        # إضافة عمود الوزن لقواعد البيانات القديمة
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(participants)")}
+        if "weight" not in columns:
+            cursor.execute("ALTER TABLE participants ADD COLUMN weight INTEGER NOT NULL DEFAULT 1")
+
+        # فهرس للترتيب والترقيم حسب تاريخ الإضافة
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_participants_created
+            ON participants (created_at, id)
+        """)
+
+        # فهرس جزئي لمعرفة وجود أوزان مختلفة عن 1 دون مسح الجدول
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_participants_weighted
+            ON participants (id) WHERE weight != 1
+        """)
+
+        # عدادات التغيير (نسخة جدول المشاركين تتغير مع كل تعديل)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('participants', 0)")
+        cursor.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('settings', 0)")
+        
+        # جدول الفائزين
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS winners (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                won_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # فهرس لترتيب الفائزين وترقيمهم وتصفيتهم حسب وقت الفوز
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_winners_won_at
+            ON winners (won_at, id)
+        """)
+        
+        # نتائج السحب المحفوظة حسب ترويسة Idempotency-Key (لإعادة نفس النتيجة عند التكرار)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                operation TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # فهرس لحذف المفاتيح المنتهية
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_idempotency_created
+            ON idempotency_keys (created_at)
+        """)
+        
+        # جدول الإعدادات
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL UNIQUE,
+                value TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+
+def init_db(wheel_id: str = DEFAULT_WHEEL):
+    """تهيئة قاعدة البيانات (بقية العجلات تُهيأ تلقائياً عند أول استخدام)"""
+    _thread_connection(wheel_id)
+
 
+def create_wheel(wheel_id: str) -> bool:
+    """إنشاء قاعدة بيانات عجلة جديدة وجداولها، أو False إذا كانت موجودة"""
+    path = Path(database_path(wheel_id))
+    WHEELS_DIR.mkdir(exist_ok=True)
+    try:
+        # وضع x يفشل إذا كان الملف موجوداً فلا يُنشئ طلبان نفس العجلة
+        path.open("xb").close()
+    except FileExistsError:
+        return False
+    init_db(wheel_id)
+    mark_created(wheel_id)
+    return True
@@ -0,0 +1,24 @@
+"""مؤشرات الترقيم (Keyset pagination)"""
+import base64
+import json
+from typing import Any, List, Optional
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """تحويل قيم آخر صف إلى مؤشر نصي معتم"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """فك المؤشر النصي، ويرفع ValueError إذا كان غير صالح"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("مؤشر الصفحة غير صالح")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("مؤشر الصفحة غير صالح")
+    return values
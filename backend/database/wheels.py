@@ -0,0 +1,73 @@
+"""تحديد العجلة الحالية ومواقع تخزين بياناتها"""
+import re
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import List
+from config.config import DATABASE, WHEELS_DIR, UPLOAD_DIR
+
+
+# العجلة الافتراضية تستخدم قاعدة البيانات ومجلد الصور الأصليين
+DEFAULT_WHEEL = "default"
+
+# معرّف العجلة يُستخدم كاسم ملف فيُقيَّد بحروف آمنة
+WHEEL_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+_WHEEL_ID = re.compile(WHEEL_ID_PATTERN)
+
+# العجلة التي يخدمها الطلب الحالي (تنتقل مع السياق إلى خيوط التنفيذ)
+current_wheel: ContextVar[str] = ContextVar("current_wheel", default=DEFAULT_WHEEL)
+
+# العجلات التي تأكد وجود قاعدة بياناتها (لا يوجد حذف للعجلات فلا حاجة لإبطالها)
+_existing = {DEFAULT_WHEEL}
+_existing_lock = threading.Lock()
+
+
+def is_valid_wheel_id(wheel_id: str) -> bool:
+    """التحقق من أن المعرّف صالح كاسم ملف"""
+    return bool(_WHEEL_ID.match(wheel_id))
+
+
+def database_path(wheel_id: str) -> str:
+    """مسار ملف قاعدة بيانات العجلة"""
+    if wheel_id == DEFAULT_WHEEL:
+        return DATABASE
+    return str(WHEELS_DIR / f"{wheel_id}.db")
+
+
+def wheel_exists(wheel_id: str) -> bool:
+    """هل أُنشئت العجلة (العجلة الافتراضية موجودة دائماً)"""
+    if wheel_id in _existing:
+        return True
+    if not Path(database_path(wheel_id)).exists():
+        return False
+    with _existing_lock:
+        _existing.add(wheel_id)
+    return True
+
+
+def mark_created(wheel_id: str):
+    """تسجيل عجلة بعد إنشاء قاعدة بياناتها"""
+    with _existing_lock:
+        _existing.add(wheel_id)
+
+
+def upload_dir(wheel_id: str, create: bool = False) -> Path:
+    """مجلد صور العجلة (يُنشأ فقط عند الكتابة فيه)"""
+    path = UPLOAD_DIR if wheel_id == DEFAULT_WHEEL else UPLOAD_DIR / "wheels" / wheel_id
+    if create:
+        path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def upload_url(wheel_id: str, file_name: str) -> str:
+    """رابط ملف داخل مجلد صور العجلة"""
+    if wheel_id == DEFAULT_WHEEL:
+        return f"/uploads/{file_name}"
+    return f"/uploads/wheels/{wheel_id}/{file_name}"
+
+
+def list_wheels() -> List[str]:
+    """جميع العجلات التي لها قاعدة بيانات"""
+    wheels = {path.stem for path in WHEELS_DIR.glob("*.db") if is_valid_wheel_id(path.stem)}
+    wheels.add(DEFAULT_WHEEL)
+    return sorted(wheels)
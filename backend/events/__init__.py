@@ -0,0 +1 @@
+"""الأحداث الفورية"""
@@ -0,0 +1,102 @@
+"""موزّع أحداث تغيّر حالة العجلة على المشتركين"""
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, Dict, Optional, Set
+from config.config import EVENTS_QUEUE_SIZE
+from database.wheels import current_wheel
+
+
+class Subscription:
+    """اشتراك عميل واحد في الأحداث (يعيش داخل حلقة الأحداث الخاصة به)"""
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, wheel_id: str):
+        self.loop = loop
+        self.wheel_id = wheel_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.lagged = False
+    
+    def offer(self, event: Dict[str, Any]):
+        """إضافة حدث إلى الطابور، وإذا امتلأ يُعلَّم العميل بأنه متأخر"""
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # العميل بطيء: نُفرغ الطابور ونطلب منه إعادة جلب الحالة كاملة
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+    
+    async def next_event(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """انتظار الحدث التالي، أو None عند انتهاء المهلة"""
+        if self.lagged:
+            self.lagged = False
+            return {"id": None, "type": "resync", "data": {}}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """نشر الأحداث من المتحكمات (من أي خيط) إلى مشتركي كل عجلة"""
+    
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+    
+    def subscribe(self, wheel_id: str) -> Subscription:
+        """إنشاء اشتراك جديد في أحداث عجلة (يُستدعى من داخل حلقة الأحداث)"""
+        subscription = Subscription(asyncio.get_running_loop(), wheel_id)
+        with self._lock:
+            self._subscribers.setdefault(wheel_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        """إلغاء الاشتراك"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.wheel_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.wheel_id]
+    
+    def subscriber_count(self) -> int:
+        """عدد المشتركين في جميع العجلات"""
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+    
+    def publish(self, wheel_id: str, event_type: str, **data: Any):
+        """نشر حدث صغير لجميع مشتركي العجلة"""
+        with self._lock:
+            if wheel_id not in self._subscribers:
+                return
+            subscribers = list(self._subscribers[wheel_id])
+            event = {"id": next(self._ids), "type": event_type, "data": data}
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # حلقة الأحداث أُغلقت
+                self.unsubscribe(subscription)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """تنسيق الحدث بصيغة Server-Sent Events"""
+    lines = []
+    if event["id"] is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+broker = EventBroker()
+
+
+def publish(event_type: str, **data: Any):
+    """نشر حدث للعجلة الحالية عبر الموزّع العام"""
+    broker.publish(current_wheel.get(), event_type, **data)
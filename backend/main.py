@@ -1,13 +1,40 @@
 """نقطة دخول التطبيق الرئيسية"""
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from config.config import APP_TITLE, APP_DESCRIPTION, CORS_ORIGINS, UPLOAD_DIR
+from config.config import (
+    APP_TITLE, APP_DESCRIPTION, CORS_ORIGINS, UPLOAD_DIR, COMPRESSION_ENABLED, METRICS_ENABLED, PROFILE_ALL_REQUESTS,
+    PROFILE_SECRET
+)
 from database.db import init_db
-from views import participants, winners, wheel, settings, upload
+from metrics.middleware import MetricsMiddleware
+from utils.compression import CompressionMiddleware
+from utils.executors import run_db, shutdown_executors
+from utils.profiling import ProfilingMiddleware
+from utils.responses import FastJSONResponse
+from utils.static_files import CachedStaticFiles
+from utils.upload_limit import UploadLimitMiddleware
+from views import participants, winners, wheel, settings, upload, state, events, wheels, metrics, admin
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """أعمال بدء التشغيل والإيقاف (بدلاً من تنفيذها عند الاستيراد)"""
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    # تهيئة قاعدة البيانات عند بدء التطبيق
+    await run_db(init_db)
+    yield
+    shutdown_executors()
+
 
 # إنشاء تطبيق FastAPI
-app = FastAPI(title=APP_TITLE, description=APP_DESCRIPTION)
+# FastJSONResponse هي الاستجابة الافتراضية لجميع الواجهات
+app = FastAPI(
+    title=APP_TITLE, description=APP_DESCRIPTION, default_response_class=FastJSONResponse, lifespan=lifespan
+)
+
+# رفض صور العجلة الكبيرة قبل استقبالها كاملة (داخل CORS حتى تصل رسالة الخطأ للمتصفح)
+app.add_middleware(UploadLimitMiddleware)
 
 # إعداد CORS للسماح بالاتصال من الواجهة الأمامية
 app.add_middleware(
@@ -18,18 +45,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ربط مجلد الصور
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# ضغط الاستجابات الكبيرة (JSON و PDF) حسب ما يقبله المتصفح
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# تحليل الأداء عند الطلب (مُعطّل ما لم يُضبط مفتاح التوقيع أو تحليل كل الطلبات)
+if PROFILE_ALL_REQUESTS or PROFILE_SECRET:
+    app.add_middleware(ProfilingMiddleware)
+
+# قياس عدد الطلبات وأزمنتها (يُضاف أخيراً ليكون الأول في التنفيذ)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
-# تهيئة قاعدة البيانات عند بدء التطبيق
-init_db()
+# ربط مجلد الصور (الملفات ذات البصمة تُخزَّن مؤقتاً في المتصفح)
+# المجلد يُنشأ في lifespan فلا نتحقق من وجوده هنا
+app.mount("/uploads", CachedStaticFiles(directory=str(UPLOAD_DIR), check_dir=False), name="uploads")
 
-# تسجيل الـ routers
-app.include_router(participants.router)
-app.include_router(winners.router)
-app.include_router(wheel.router)
-app.include_router(settings.router)
-app.include_router(upload.router)
+# تسجيل الـ routers: /api للعجلة الافتراضية و /api/wheels/{wheel_id} لكل عجلة مستقلة
+for router in (
+    participants.router,
+    winners.router,
+    wheel.router,
+    settings.router,
+    upload.router,
+    state.router,
+    events.router,
+):
+    app.include_router(router, prefix="/api")
+    app.include_router(router, prefix="/api/wheels/{wheel_id}", dependencies=[Depends(wheels.use_wheel)])
+app.include_router(wheels.router)
+app.include_router(admin.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -0,0 +1 @@
+"""مقاييس الأداء بصيغة Prometheus"""
@@ -0,0 +1,53 @@
+"""قياس عدد طلبات HTTP وأزمنتها لكل مسار"""
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from metrics.registry import HTTP_DURATION, HTTP_IN_PROGRESS, HTTP_REQUESTS
+
+
+class MetricsMiddleware:
+    """
+    Middleware بصيغة ASGI مباشرة (بدون BaseHTTPMiddleware) حتى لا يؤثر على البث
+    
+    التسمية تستخدم قالب المسار (مثل /api/wheels/{wheel_id}/spin) وليس المسار
+    الفعلي حتى يبقى عدد السلاسل محدوداً. اتصالات الأحداث (SSE) تُعد ولا يُسجل
+    زمنها لأنها تبقى مفتوحة طويلاً.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+        
+        async def send_wrapper(message: Message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+        
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+                router = route.tags[0] if getattr(route, "tags", None) else ""
+            else:
+                # الملفات الثابتة والمسارات غير الموجودة
+                path = "/uploads" if scope["path"].startswith("/uploads/") else "unmatched"
+                router = ""
+            method = scope["method"]
+            HTTP_REQUESTS.labels(router, method, path, str(status)).inc()
+            if not streaming:
+                HTTP_DURATION.labels(router, method, path).observe(time.perf_counter() - started)
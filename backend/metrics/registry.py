@@ -0,0 +1,229 @@
+"""سجل مقاييس خفيف بصيغة Prometheus النصية (بدون مكتبات خارجية)"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# حدود الأزمنة بالثواني (من 1ms إلى 10s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# حدود أحجام الملفات بالبايت (من 16KB إلى 64MB)
+SIZE_BUCKETS = tuple(16 * 1024 * 4 ** i for i in range(7))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+    
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+    
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+    
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    """مقياس مع أبنائه حسب قيم التسميات (labels)"""
+    
+    kind = ""
+    child_class: type = _CounterChild
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+    
+    def _new_child(self):
+        return self.child_class()
+    
+    def labels(self, *values: str):
+        """الابن الخاص بقيم التسميات (يُنشأ عند أول استخدام)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+    
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+        return lines
+    
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """مقياس لحظي، ويمكن حسابه عند القراءة عبر function"""
+    
+    kind = "gauge"
+    child_class = _GaugeChild
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        self.function = function
+        super().__init__(name, documentation, labelnames)
+    
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+    
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+    
+    def _samples(self) -> List[str]:
+        if self.function is not None:
+            return [f"{self.name} {_format_value(self.function())}"]
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value: float):
+        self._default.observe(value)
+    
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """جميع المقاييس المسجلة بترتيب تعريفها"""
+    
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+    
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """تصدير جميع المقاييس بصيغة Prometheus النصية"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# مقاييس طلبات HTTP
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "عدد طلبات HTTP", ("router", "method", "route", "status")
+))
+HTTP_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "زمن معالجة طلبات HTTP", ("router", "method", "route")
+))
+HTTP_IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress", "الطلبات قيد المعالجة (ومنها اتصالات الأحداث المفتوحة)"
+))
+
+# مقاييس SQLite
+DB_DURATION = registry.register(Histogram(
+    "db_transaction_duration_seconds", "زمن كتل قاعدة البيانات لكل دالة في المتحكمات", ("method",)
+))
+DB_CONNECTIONS_OPEN = registry.register(Gauge(
+    "db_connections_open", "اتصالات SQLite المفتوحة في جميع الخيوط"
+))
+DB_CONNECTIONS_OPENED = registry.register(Counter(
+    "db_connections_opened_total", "عدد اتصالات SQLite التي فُتحت"
+))
+
+# مقاييس ملف PDF
+PDF_REQUESTS = registry.register(Counter(
+    "pdf_requests_total", "طلبات ملف PDF للفائزين", ("cache",)
+))
+PDF_RENDER_DURATION = registry.register(Histogram(
+    "pdf_render_duration_seconds", "زمن إنشاء ملف PDF", buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+))
+PDF_SIZE = registry.register(Histogram(
+    "pdf_size_bytes", "حجم ملف PDF المُنشأ", buckets=SIZE_BUCKETS
+))
+
+# مقاييس السحب
+SPINS = registry.register(Counter(
+    "spins_total", "عدد عمليات السحب", ("mode",)
+))
+WINNERS_DRAWN = registry.register(Counter(
+    "winners_drawn_total", "عدد الفائزين المسحوبين"
+))
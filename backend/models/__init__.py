@@ -2,14 +2,32 @@
 from .schemas import (
     Participant,
     ParticipantsList,
+    ParticipantWeight,
+    ParticipantsResponse,
+    Winner,
+    WinnersResponse,
     WinnerResponse,
-    TitleRequest
+    SpinBatchResponse,
+    WheelImage,
+    StateResponse,
+    SpinBatchRequest,
+    TitleRequest,
+    SettingsUpdate
 )
 
 __all__ = [
     "Participant",
     "ParticipantsList",
+    "ParticipantWeight",
+    "ParticipantsResponse",
+    "Winner",
+    "WinnersResponse",
     "WinnerResponse",
-    "TitleRequest"
+    "SpinBatchResponse",
+    "WheelImage",
+    "StateResponse",
+    "SpinBatchRequest",
+    "TitleRequest",
+    "SettingsUpdate"
 ]
 
@@ -1,16 +1,45 @@
 """نماذج البيانات (Pydantic Schemas)"""
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from config.config import MAX_BATCH_DRAW, MAX_PARTICIPANT_WEIGHT
 
 
 class Participant(BaseModel):
     """نموذج مشارك واحد"""
     name: str
+    weight: int = Field(1, ge=1, le=MAX_PARTICIPANT_WEIGHT)  # عدد التذاكر
 
 
 class ParticipantsList(BaseModel):
     """نموذج قائمة المشاركين"""
     names: List[str]
+    weight: int = Field(1, ge=1, le=MAX_PARTICIPANT_WEIGHT)  # نفس عدد التذاكر للجميع
+
+
+class ParticipantWeight(BaseModel):
+    """نموذج تغيير وزن مشارك"""
+    weight: int = Field(ge=1, le=MAX_PARTICIPANT_WEIGHT)
+
+
+class ParticipantsResponse(BaseModel):
+    """نموذج استجابة قائمة المشاركين (count للقائمة الكاملة و next_cursor للصفحات)"""
+    participants: List[str]
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class Winner(BaseModel):
+    """نموذج فائز في القائمة (id يظهر في الصفحات فقط)"""
+    id: Optional[int] = None
+    name: str
+    won_at: str
+
+
+class WinnersResponse(BaseModel):
+    """نموذج استجابة قائمة الفائزين"""
+    winners: List[Winner]
+    count: int
+    next_cursor: Optional[str] = None
 
 
 class WinnerResponse(BaseModel):
@@ -20,7 +49,44 @@ class WinnerResponse(BaseModel):
     message: str = ""
 
 
+class SpinBatchResponse(BaseModel):
+    """نموذج استجابة سحب عدة فائزين"""
+    winners: List[str]
+    count: int
+    remaining_count: int
+    message: str = ""
+
+
+class WheelImage(BaseModel):
+    """نموذج صورة العجلة ونسخها المصغرة حسب الحجم والصيغة"""
+    url: Optional[str] = None
+    variants: Dict[str, Dict[str, str]] = {}
+    exists: bool
+
+
+class StateResponse(BaseModel):
+    """نموذج حالة العجلة الكاملة"""
+    participants: List[str]
+    participants_count: int
+    winners: List[Winner]
+    winners_count: int
+    wheel_image: WheelImage
+    settings: Dict[str, Any]
+
+
+class SpinBatchRequest(BaseModel):
+    """نموذج طلب سحب عدة فائزين"""
+    count: int = Field(gt=0, le=MAX_BATCH_DRAW)
+
+
 class TitleRequest(BaseModel):
     """نموذج طلب العنوان"""
     title: str
 
+
+class SettingsUpdate(BaseModel):
+    """نموذج تحديث عدة إعدادات دفعة واحدة"""
+    wheel_title: Optional[str] = None
+    text_color: Optional[str] = None
+    max_display_names: Optional[int] = Field(None, ge=0)
+    sound_muted: Optional[bool] = None
@@ -0,0 +1 @@
+"""أدوات مساعدة"""
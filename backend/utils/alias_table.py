@@ -0,0 +1,46 @@
+"""جدول Vose للاختيار الموزون بزمن ثابت"""
+import secrets
+from array import array
+from typing import Sequence
+
+
+class AliasTable:
+    """
+    جدول Vose المستعار بأعداد صحيحة فقط
+    
+    كل عمود سعته مجموع الأوزان: يُختار عمود عشوائياً ثم يُقرر بين صاحبه
+    وبديله. الحساب بالأعداد الصحيحة فلا توجد أخطاء تقريب، والعشوائية آمنة.
+    """
+    
+    def __init__(self, weights: Sequence[int]):
+        count = len(weights)
+        total = sum(weights)
+        if count == 0 or total <= 0:
+            raise ValueError("يجب أن يكون هناك وزن موجب واحد على الأقل")
+        
+        scaled = [weight * count for weight in weights]
+        self._threshold = array("q", [total]) * count
+        self._alias = array("l", range(count))
+        self._total = total
+        
+        small = [i for i, value in enumerate(scaled) if value < total]
+        large = [i for i, value in enumerate(scaled) if value >= total]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self._threshold[less] = scaled[less]
+            self._alias[less] = more
+            # الجزء الناقص من العمود الصغير يُؤخذ من العمود الكبير
+            scaled[more] -= total - scaled[less]
+            (small if scaled[more] < total else large).append(more)
+        # الأعمدة المتبقية ممتلئة تماماً (عتبتها = المجموع)
+    
+    def __len__(self) -> int:
+        return len(self._alias)
+    
+    def sample(self) -> int:
+        """اختيار فهرس بالاحتمال المتناسب مع وزنه"""
+        column = secrets.randbelow(len(self._alias))
+        if secrets.randbelow(self._total) < self._threshold[column]:
+            return column
+        return self._alias[column]
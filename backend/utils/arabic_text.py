@@ -0,0 +1,73 @@
+"""تشكيل النص العربي وترتيبه للعرض (مع ذاكرة مؤقتة)"""
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict, Iterable, List
+from config.config import TEXT_SHAPING_CACHE_SIZE
+
+# المكتبات تُحمَّل عند أول نص عربي فقط، وهنا نتحقق من وجودها دون استيرادها
+ARABIC_SUPPORT = find_spec("arabic_reshaper") is not None and find_spec("bidi") is not None
+if not ARABIC_SUPPORT:
+    print("تحذير: مكتبات دعم العربية غير مثبتة. سيتم عرض النص العربي بدون تشكيل.")
+
+
+# الحروف التي تحتاج تشكيلاً أو قلباً للاتجاه (العربية والعبرية وأشكال العرض)
+_RTL_CHARS = re.compile(r"[\u0590-\u08FF\uFB1D-\uFDFF\uFE70-\uFEFF]")
+
+
+@lru_cache(maxsize=1)
+def _shaping_functions():
+    """استيراد مكتبات التشكيل عند أول استخدام"""
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+    return arabic_reshaper.reshape, get_display
+
+
+@lru_cache(maxsize=TEXT_SHAPING_CACHE_SIZE)
+def _shape_cached(text: str) -> str:
+    try:
+        reshape, get_display = _shaping_functions()
+        # إعادة تشكيل النص العربي
+        reshaped_text = reshape(text)
+        # تحويل الاتجاه من اليمين لليسار
+        return get_display(reshaped_text)
+    except Exception as e:
+        # في حالة الخطأ، إرجاع النص الأصلي
+        print(f"تحذير: خطأ في تحويل النص العربي: {e}")
+        return text
+
+
+def shape(text: str) -> str:
+    """تحويل النص العربي لعرضه بشكل صحيح في PDF والصور"""
+    if not ARABIC_SUPPORT or not _RTL_CHARS.search(text):
+        # النص اللاتيني والأرقام لا تتغير فلا داعي للتخزين
+        return text
+    return _shape_cached(text)
+
+
+def shape_many(texts: Iterable[str]) -> List[str]:
+    """تحويل عدة نصوص دفعة واحدة مع تشكيل كل نص مكرر مرة واحدة فقط"""
+    shaped: Dict[str, str] = {}
+    result = []
+    for text in texts:
+        value = shaped.get(text)
+        if value is None:
+            value = shaped[text] = shape(text)
+        result.append(value)
+    return result
+
+
+def cache_stats() -> Dict[str, int]:
+    """إحصائيات الذاكرة المؤقتة للتشكيل"""
+    info = _shape_cached.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize
+    }
+
+
+def clear_cache():
+    """مسح الذاكرة المؤقتة للتشكيل"""
+    _shape_cached.cache_clear()
@@ -0,0 +1,192 @@
+"""ضغط الاستجابات حسب Accept-Encoding (gzip، و brotli أو zstd عند توفرهما)"""
+import zlib
+from typing import Callable, Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.config import COMPRESSION_LEVELS, COMPRESSION_MIN_SIZE, COMPRESSION_OFFLOAD_SIZE, COMPRESSION_TYPES
+from utils.executors import run_compress
+
+try:
+    import brotli
+    BROTLI_SUPPORT = True
+except ImportError:
+    BROTLI_SUPPORT = False
+
+try:
+    import zstandard
+    ZSTD_SUPPORT = True
+except ImportError:
+    ZSTD_SUPPORT = False
+
+
+class _GzipEncoder:
+    """ضاغط gzip تدريجي"""
+    
+    def __init__(self, level: int):
+        # 31 = ترويسة gzip مع نافذة 32KB
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+    
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    """ضاغط brotli تدريجي"""
+    
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+    
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    """ضاغط zstd تدريجي"""
+    
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+    
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# الصيغ المتوفرة مرتبة حسب الأفضلية (الأعلى نسبة ضغط أولاً)
+ENCODERS: Dict[str, Callable] = {}
+if BROTLI_SUPPORT:
+    ENCODERS["br"] = _BrotliEncoder
+if ZSTD_SUPPORT:
+    ENCODERS["zstd"] = _ZstdEncoder
+ENCODERS["gzip"] = _GzipEncoder
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """اختيار أفضل صيغة يقبلها العميل (q=0 تعني الرفض)"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ENCODERS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def _compressible(headers: Headers) -> bool:
+    """الاستجابة قابلة للضغط: نوع مسموح وغير مضغوطة مسبقاً"""
+    if "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    return media_type in COMPRESSION_TYPES
+
+
+class CompressionMiddleware:
+    """
+    Middleware بصيغة ASGI مباشرة لضغط الاستجابات
+    
+    الاستجابة الكاملة (جزء واحد) تُضغط فقط إذا تجاوزت COMPRESSION_MIN_SIZE.
+    الاستجابات المتدفقة تُضغط جزءاً بجزء دون تجميعها في الذاكرة، والأنواع غير
+    المذكورة في COMPRESSION_TYPES (مثل أحداث SSE والصور) تمر كما هي.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start: Optional[Message] = None
+        encoder = None
+        passthrough = False
+        
+        async def compress(data: bytes) -> bytes:
+            # الأجزاء الكبيرة تُضغط خارج حلقة الأحداث (zlib و brotli يحرران الـ GIL)
+            # في مجموعة خيوط مستقلة عن إنشاء PDF
+            if len(data) >= COMPRESSION_OFFLOAD_SIZE:
+                return await run_compress(encoder.compress, data)
+            return encoder.compress(data)
+        
+        async def send_wrapper(message: Message):
+            nonlocal start, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+            
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if message["status"] < 200 or message["status"] in (204, 206, 304) or not _compressible(headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # الترويسات تُرسل بعد معرفة حجم الجزء الأول
+                    start = message
+                return
+            
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            
+            if encoder is None:
+                headers = MutableHeaders(raw=start["headers"])
+                declared = headers.get("content-length")
+                # الاستجابات الصغيرة لا تستفيد من الضغط
+                if declared:
+                    small = int(declared) < COMPRESSION_MIN_SIZE
+                else:
+                    small = not more_body and len(body) < COMPRESSION_MIN_SIZE
+                if small:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                
+                encoder = ENCODERS[encoding](COMPRESSION_LEVELS[encoding])
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # المحتوى المرسل لم يعد مطابقاً بايت ببايت
+                    headers["etag"] = f"W/{etag}"
+                if not more_body:
+                    data = await compress(body) + encoder.finish()
+                    headers["content-length"] = str(len(data))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                # الطول النهائي غير معروف فيُرسل الباقي بتقطيع HTTP
+                del headers["content-length"]
+                await send(start)
+            
+            data = await compress(body)
+            if not more_body:
+                data += encoder.finish()
+            # الضاغط قد يحتفظ بالبيانات لجزء لاحق فلا نرسل أجزاء فارغة
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+        
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,72 @@
+"""تنفيذ العمليات المتزامنة خارج حلقة الأحداث"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, TypeVar
+from config.config import DB_THREADS, CPU_THREADS, COMPRESSION_THREADS
+from database.db import close_db
+from utils.profiling import current_profile
+
+T = TypeVar("T")
+
+# مجموعة خيوط محدودة لعمليات SQLite (لكل خيط اتصاله الخاص)
+_db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="sqlite")
+
+# مجموعة منفصلة للأعمال الثقيلة حتى لا تحجز خيوط قاعدة البيانات
+_cpu_executor = ThreadPoolExecutor(max_workers=CPU_THREADS, thread_name_prefix="cpu")
+
+# مجموعة خاصة بضغط الاستجابات حتى لا تنتظر القوائم الكبيرة خلف إنشاء PDF
+_compress_executor = ThreadPoolExecutor(max_workers=COMPRESSION_THREADS, thread_name_prefix="compress")
+
+
+async def _run_in(executor: ThreadPoolExecutor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """التنفيذ في مجموعة خيوط مع نقل السياق (مثل العجلة الحالية)"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    profile = current_profile.get()
+    if profile is not None:
+        # الطلب تحت التحليل: تحليل الدالة في خيط التنفيذ أيضاً
+        func, args = profile.run_call, (func, *args)
+    return await loop.run_in_executor(executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """تنفيذ دالة تصل إلى قاعدة البيانات في مجموعة خيوط SQLite"""
+    return await _run_in(_db_executor, func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """تنفيذ عمل ثقيل (مثل إنشاء PDF) في مجموعة خيوط منفصلة"""
+    return await _run_in(_cpu_executor, func, *args, **kwargs)
+
+
+async def run_compress(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """ضغط جزء كبير من استجابة في مجموعة خيوط الضغط"""
+    return await _run_in(_compress_executor, func, *args, **kwargs)
+
+
+def _run_on_each_thread(executor: ThreadPoolExecutor, workers: int, func: Callable[[], Any]):
+    """تنفيذ الدالة مرة واحدة في كل خيط من المجموعة"""
+    # الحاجز يُبقي كل خيط مشغولاً حتى تصل جميع المهام، فلا يأخذ خيط مهمتين
+    barrier = threading.Barrier(workers)
+    
+    def task():
+        func()
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+    
+    wait([executor.submit(task) for _ in range(workers)])
+
+
+def shutdown_executors():
+    """إيقاف مجموعات الخيوط عند إغلاق التطبيق"""
+    # اتصالات SQLite تُغلق من خيوطها حتى يُنفَّذ checkpoint لملف WAL ويُغلق بشكل سليم
+    _run_on_each_thread(_db_executor, DB_THREADS, close_db)
+    _run_on_each_thread(_cpu_executor, CPU_THREADS, close_db)
+    _db_executor.shutdown(wait=True)
+    _cpu_executor.shutdown(wait=True)
+    _compress_executor.shutdown(wait=True)
@@ -0,0 +1,195 @@
+"""تحليل أداء طلب واحد عند الطلب (cProfile) وحفظ النتائج"""
+import asyncio
+import cProfile
+import hashlib
+import hmac
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from io import StringIO
+from typing import Callable, Dict, List, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.config import PROFILE_ALL_REQUESTS, PROFILE_SECRET, PROFILE_DIR, PROFILE_KEEP
+
+
+# التحليل الجاري للطلب الحالي (ينتقل مع السياق إلى خيوط run_db و run_cpu)
+current_profile: ContextVar[Optional["ProfileCollector"]] = ContextVar("current_profile", default=None)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_NAME = re.compile(r"^[\w.-]+\.prof$")
+
+# منذ Python 3.12 يعتمد cProfile على sys.monitoring: محلل واحد فقط في العملية،
+# لكنه يلتقط الاستدعاءات في جميع الخيوط فلا حاجة لمحلل لكل خيط تنفيذ
+SINGLE_PROFILER = sys.version_info >= (3, 12)
+
+
+class ProfileCollector:
+    """
+    تجميع تحليل خيط حلقة الأحداث مع تحليلات خيوط التنفيذ لطلب واحد
+    
+    قبل 3.12 يُحلَّل كل استدعاء في خيط التنفيذ بمحلل مستقل ثم تُدمج النتائج،
+    ومن 3.12 يكفي محلل حلقة الأحداث لأنه يتبع جميع الخيوط.
+    """
+    
+    def __init__(self):
+        self.loop_profile = cProfile.Profile()
+        self._worker_profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+    
+    def run_call(self, func: Callable, *args, **kwargs):
+        """تنفيذ دالة في خيط التنفيذ مع تحليلها"""
+        if SINGLE_PROFILER:
+            # تشغيل محلل ثانٍ يفشل بـ ValueError، ومحلل حلقة الأحداث يلتقطها
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._worker_profiles.append(profile)
+    
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.loop_profile)
+        with self._lock:
+            for profile in self._worker_profiles:
+                stats.add(profile)
+        return stats
+
+
+def sign(method: str, path: str, expires: int, secret: str = PROFILE_SECRET) -> str:
+    """قيمة ترويسة X-Profile لطلب معيّن صالحة حتى expires (ثوانٍ unix)"""
+    message = f"{expires}:{method.upper()}:{path}".encode()
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"{expires}:{digest}"
+
+
+def verify(value: str, method: str, path: str) -> bool:
+    """التحقق من توقيع ترويسة X-Profile وعدم انتهاء صلاحيتها"""
+    if not PROFILE_SECRET:
+        return False
+    expires, _, _ = value.partition(":")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    # المقارنة كبايتات لأن الترويسة قد تحتوي على أحرف غير ASCII
+    expected = sign(method, path, int(expires)).encode()
+    return hmac.compare_digest(value.encode("latin-1", "replace"), expected)
+
+
+def _save(collector: ProfileCollector, name: str, meta: Dict):
+    """حفظ التحليل ووصفه ثم حذف الأقدم بعد PROFILE_KEEP ملف"""
+    PROFILE_DIR.mkdir(exist_ok=True)
+    collector.stats().dump_stats(str(PROFILE_DIR / name))
+    (PROFILE_DIR / name).with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+    profiles = sorted(PROFILE_DIR.glob("*.prof"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for old in profiles[PROFILE_KEEP:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".json").unlink(missing_ok=True)
+
+
+def list_profiles() -> List[Dict]:
+    """التحليلات المحفوظة من الأحدث إلى الأقدم"""
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = []
+    for path in sorted(PROFILE_DIR.glob("*.prof"), key=lambda path: path.stat().st_mtime, reverse=True):
+        try:
+            meta = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        profiles.append({"name": path.name, "size": path.stat().st_size, **meta})
+    return profiles
+
+
+def profile_path(name: str):
+    """مسار ملف تحليل محفوظ، أو None إذا كان الاسم غير صالح أو غير موجود"""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = PROFILE_DIR / name
+    return path if path.exists() else None
+
+
+def profile_report(name: str, limit: int = 40) -> Optional[str]:
+    """ملخص نصي لأثقل الدوال حسب الزمن التراكمي"""
+    path = profile_path(name)
+    if path is None:
+        return None
+    stream = StringIO()
+    pstats.Stats(str(path), stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    تحليل طلب واحد من الـ view حتى المتحكمات و SQLite
+    
+    يعمل عند تفعيل PROFILE_ALL_REQUESTS أو عند إرسال ترويسة X-Profile موقّعة.
+    يُحلَّل طلب واحد في كل مرة لأن cProfile على خيط حلقة الأحداث يلتقط أيضاً
+    ما يُنفَّذ من طلبات أخرى في نفس الوقت.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._busy = False
+    
+    def _wanted(self, scope: Scope) -> bool:
+        if PROFILE_ALL_REQUESTS:
+            return True
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return verify(value.decode("latin-1"), scope["method"], scope["path"])
+        return False
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        collector = ProfileCollector()
+        try:
+            collector.loop_profile.enable()
+        except ValueError:
+            # أداة تحليل أخرى تعمل في العملية (3.12+): تنفيذ الطلب بدون تحليل
+            await self.app(scope, receive, send)
+            return
+        
+        self._busy = True
+        slug = re.sub(r"[^\w-]+", "_", scope["path"]).strip("_")[:60] or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}-{scope['method']}-{slug}.prof"
+        status = 500
+        
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", name.encode())]
+            await send(message)
+        
+        token = current_profile.set(collector)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            collector.loop_profile.disable()
+            current_profile.reset(token)
+            self._busy = False
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration": time.perf_counter() - started,
+                "created_at": time.time(),
+            }
+            # الكتابة على القرص خارج حلقة الأحداث
+            await asyncio.get_running_loop().run_in_executor(None, _save, collector, name, meta)
+
+
+if __name__ == "__main__":
+    # إنشاء ترويسة موقّعة: python -m utils.profiling GET /api/spin [مدة الصلاحية بالثواني]
+    method, path = sys.argv[1], sys.argv[2]
+    ttl = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    print(f"X-Profile: {sign(method, path, int(time.time()) + ttl)}")
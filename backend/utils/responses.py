@@ -0,0 +1,25 @@
+"""استجابات JSON السريعة"""
+from typing import Any
+from starlette.responses import JSONResponse
+
+# orjson أسرع بكثير من json القياسي في القوائم الكبيرة
+try:
+    import orjson
+    ORJSON_SUPPORT = True
+except ImportError:
+    ORJSON_SUPPORT = False
+    print("تحذير: مكتبة orjson غير مثبتة. سيتم استخدام json القياسي.")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    استجابة JSON تستخدم orjson عند توفرها
+    
+    إرجاعها مباشرة من الواجهة يتجاوز jsonable_encoder، لذا يجب أن يحتوي
+    المحتوى على أنواع JSON بسيطة فقط (نصوص وأرقام وقوائم وقواميس).
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if ORJSON_SUPPORT:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(content)
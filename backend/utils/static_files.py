@@ -0,0 +1,40 @@
+"""تقديم الملفات المرفوعة مع التخزين المؤقت في المتصفح"""
+import os
+import re
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from config.config import UPLOAD_HASH_LENGTH, STATIC_MAX_AGE
+
+
+# الملفات التي يحتوي اسمها على بصمة المحتوى لا يتغير محتواها أبداً
+_HASHED_NAME = re.compile(rf"\.[0-9a-f]{{{UPLOAD_HASH_LENGTH}}}\.[A-Za-z0-9]+$")
+
+
+def _strip_weak(tag: str) -> str:
+    """إزالة بادئة الوسم الضعيف (المقارنة الضعيفة كافية لـ GET)"""
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles مع Cache-Control طويل للملفات ذات البصمة و ETag للباقي"""
+    
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if _HASHED_NAME.search(str(full_path)):
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        else:
+            # الأسماء الثابتة يجب التحقق منها في كل مرة
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+    
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match له الأولوية على If-Modified-Since
+            etag = _strip_weak(response_headers.get("etag", ""))
+            tags = [_strip_weak(tag) for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        return super().is_not_modified(response_headers, request_headers)
@@ -0,0 +1,52 @@
+"""رفض الملفات المرفوعة الكبيرة قبل أن يستقبلها Starlette كاملة"""
+from typing import Optional
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.config import MAX_IMAGE_UPLOAD_BYTES, UPLOAD_FORM_OVERHEAD
+from utils.responses import FastJSONResponse
+
+# المسارات المحدودة (تنتهي بها مسارات /api و /api/wheels/{wheel_id})
+IMAGE_UPLOAD_SUFFIX = "/upload-wheel-image"
+
+TOO_LARGE_MESSAGE = f"حجم الصورة أكبر من الحد المسموح ({MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)}MB)"
+
+
+class UploadLimitMiddleware:
+    """
+    Middleware بصيغة ASGI مباشرة لتحديد حجم جسم طلب رفع صورة العجلة
+    
+    Starlette يقرأ نموذج multipart كاملاً ويحفظه على القرص قبل استدعاء الـ view،
+    لذا يُرفض الطلب هنا: مباشرة حسب Content-Length، أو أثناء القراءة عند تجاوز
+    الحد إذا لم يُرسل الطول (التحقق الدقيق لحجم الملف يبقى في UploadController).
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        is_upload = scope["type"] == "http" and scope["method"] == "POST" and scope["path"].endswith(IMAGE_UPLOAD_SUFFIX)
+        if not is_upload:
+            await self.app(scope, receive, send)
+            return
+        
+        limit = MAX_IMAGE_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD
+        declared: Optional[str] = Headers(scope=scope).get("content-length")
+        if declared and declared.isdigit() and int(declared) > limit:
+            response = FastJSONResponse({"detail": TOO_LARGE_MESSAGE}, status_code=413)
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def receive_wrapper() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # يُرفع أثناء قراءة النموذج فتعيده FastAPI كما هو (بدلاً من 400)
+                    raise HTTPException(status_code=413, detail=TOO_LARGE_MESSAGE)
+            return message
+        
+        await self.app(scope, receive_wrapper, send)
@@ -0,0 +1,39 @@
+"""واجهات الإدارة (ملفات تحليل الأداء)"""
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from config.config import PROFILE_SECRET
+from utils.executors import run_cpu
+from utils.profiling import list_profiles, profile_path, profile_report
+
+
+async def require_admin(x_admin_token: str = Header("")):
+    """السماح فقط لمن يملك مفتاح التحليل"""
+    # المقارنة كبايتات لأن الترويسة قد تحتوي على أحرف غير ASCII
+    token = x_admin_token.encode("latin-1", "replace")
+    if not PROFILE_SECRET or not hmac.compare_digest(token, PROFILE_SECRET.encode()):
+        raise HTTPException(status_code=403, detail="غير مصرح")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """آخر ملفات تحليل الأداء المحفوظة"""
+    profiles = await run_cpu(list_profiles)
+    return {"profiles": profiles, "count": len(profiles)}
+
+
+@router.get("/profiles/{name}")
+async def get_profile(name: str, format: str = Query("prof", pattern="^(prof|text)$")):
+    """تنزيل ملف التحليل (pstats) أو ملخص نصي لأثقل الدوال"""
+    if format == "text":
+        report = await run_cpu(profile_report, name)
+        if report is None:
+            raise HTTPException(status_code=404, detail="ملف التحليل غير موجود")
+        return PlainTextResponse(report)
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="ملف التحليل غير موجود")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
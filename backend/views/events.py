@@ -0,0 +1,38 @@
+"""واجهة الأحداث الفورية (Server-Sent Events)"""
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from config.config import EVENTS_KEEPALIVE
+from database.wheels import current_wheel
+from events.broker import broker, format_sse
+
+router = APIRouter(tags=["events"])
+
+
+@router.get("/events")
+async def stream_events():
+    """بث أحداث تغيّر المشاركين والفائزين والإعدادات"""
+    wheel_id = current_wheel.get()
+    
+    async def event_stream():
+        # الاشتراك داخل المولّد حتى يُلغى دائماً في finally، وقبل أول رسالة حتى
+        # لا تضيع أحداث بين فتح الاتصال وجلب العميل للحالة
+        subscription = broker.subscribe(wheel_id)
+        try:
+            # إعادة الاتصال تلقائياً بعد 3 ثوانٍ عند الانقطاع
+            yield "retry: 3000\n\n"
+            while True:
+                event = await subscription.next_event(EVENTS_KEEPALIVE)
+                if event is None:
+                    # تعليق للحفاظ على الاتصال عبر الـ proxies
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            # يُنفَّذ أيضاً عند قطع العميل للاتصال
+            broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
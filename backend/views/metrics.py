@@ -0,0 +1,27 @@
+"""واجهة مقاييس الأداء بصيغة Prometheus"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from events.broker import broker
+from metrics.registry import Gauge, registry
+from utils import arabic_text
+
+router = APIRouter(tags=["metrics"])
+
+# مقاييس تُحسب لحظة القراءة
+registry.register(Gauge(
+    "events_subscribers", "عدد اتصالات الأحداث الفورية المفتوحة", function=broker.subscriber_count
+))
+registry.register(Gauge(
+    "text_shaping_cache_size", "عدد النصوص في ذاكرة تشكيل العربية",
+    function=lambda: arabic_text.cache_stats()["size"]
+))
+registry.register(Gauge(
+    "text_shaping_cache_hits", "عدد مرات إيجاد النص في ذاكرة التشكيل",
+    function=lambda: arabic_text.cache_stats()["hits"]
+))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """تصدير المقاييس لـ Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,44 +1,80 @@
 """واجهات المشاركين"""
-from fastapi import APIRouter, HTTPException
-from models.schemas import Participant, ParticipantsList
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from config.config import BULK_SKIPPED_SAMPLE_MAX, MAX_PAGE_SIZE
+from models.schemas import Participant, ParticipantsList, ParticipantWeight, ParticipantsResponse
 from controllers.participant_controller import ParticipantController
+from utils.executors import run_db
+from utils.responses import FastJSONResponse
 
-router = APIRouter(prefix="/api/participants", tags=["participants"])
+router = APIRouter(prefix="/participants", tags=["participants"])
 
 
-@router.get("")
-async def get_participants():
-    """الحصول على قائمة جميع المشاركين"""
-    participants = ParticipantController.get_all()
-    return {"participants": participants, "count": len(participants)}
+@router.get("", response_model=ParticipantsResponse)
+async def get_participants(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """الحصول على قائمة المشاركين كاملة، أو صفحة منها عند تحديد limit"""
+    if limit is None:
+        participants = await run_db(ParticipantController.get_all)
+        # القائمة تحتوي على نصوص فقط فلا حاجة للتحويل العام
+        return FastJSONResponse({"participants": participants, "count": len(participants)})
+    
+    result = await run_db(ParticipantController.get_page, limit, cursor)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["message"])
+    return FastJSONResponse({
+        "participants": result["participants"],
+        "next_cursor": result["next_cursor"]
+    })
+
+
+@router.get("/count")
+async def get_participants_count():
+    """عدد المشاركين فقط"""
+    return {"count": await run_db(ParticipantController.count)}
 
 
 @router.post("")
 async def add_participant(participant: Participant):
     """إضافة مشارك واحد"""
-    result = ParticipantController.add(participant.name)
+    result = await run_db(ParticipantController.add, participant.name, participant.weight)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     return {"message": result["message"], "name": result["name"]}
 
 
 @router.post("/bulk")
-async def add_participants_bulk(participants: ParticipantsList):
+async def add_participants_bulk(
+    participants: ParticipantsList,
+    skipped_sample: int = Query(0, ge=0, le=BULK_SKIPPED_SAMPLE_MAX)
+):
     """إضافة عدة مشاركين دفعة واحدة"""
-    result = ParticipantController.add_bulk(participants.names)
+    result = await run_db(
+        ParticipantController.add_bulk, participants.names, skipped_sample, participants.weight
+    )
     return {
         "message": result["message"],
-        "added": result["added"],
         "skipped": result["skipped"],
         "added_count": result["added_count"],
         "skipped_count": result["skipped_count"]
     }
 
 
+@router.put("/{name}/weight")
+async def set_participant_weight(name: str, request: ParticipantWeight):
+    """تغيير عدد تذاكر مشارك"""
+    result = await run_db(ParticipantController.set_weight, name, request.weight)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return {"message": result["message"], "name": result["name"], "weight": result["weight"]}
+
+
 @router.delete("/{name}")
 async def remove_participant(name: str):
     """حذف مشارك"""
-    result = ParticipantController.remove(name)
+    result = await run_db(ParticipantController.remove, name)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["message"])
     return {"message": result["message"]}
@@ -47,6 +83,6 @@ async def remove_participant(name: str):
 @router.delete("")
 async def clear_participants():
     """مسح جميع المشاركين"""
-    result = ParticipantController.clear_all()
+    result = await run_db(ParticipantController.clear_all)
     return {"message": result["message"]}
 
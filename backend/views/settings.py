@@ -1,29 +1,47 @@
 """واجهات الإعدادات"""
 from fastapi import APIRouter, HTTPException
+from models.schemas import SettingsUpdate
 from controllers.setting_controller import SettingController
+from utils.executors import run_db
 
-router = APIRouter(prefix="/api/settings", tags=["settings"])
+router = APIRouter(prefix="/settings", tags=["settings"])
+
+
+@router.get("")
+async def get_settings():
+    """جلب جميع الإعدادات دفعة واحدة"""
+    return await run_db(SettingController.get_all)
+
+
+@router.patch("")
+async def update_settings(settings: SettingsUpdate):
+    """تحديث عدة إعدادات في معاملة واحدة"""
+    values = settings.model_dump(exclude_unset=True, exclude_none=True)
+    result = await run_db(SettingController.update_many, values)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["message"])
+    return {"message": result["message"], "settings": result["settings"]}
 
 
 @router.post("/title")
 async def set_title(title: dict):
     """حفظ عنوان العجلة"""
     title_text = title.get('title', '').strip()
-    result = SettingController.set_title(title_text)
+    result = await run_db(SettingController.set_title, title_text)
     return {"message": result["message"], "title": result["title"]}
 
 
 @router.get("/title")
 async def get_title():
     """جلب عنوان العجلة"""
-    result = SettingController.get_title()
+    result = await run_db(SettingController.get_title)
     return {"title": result["title"], "exists": result["exists"]}
 
 
 @router.delete("/title")
 async def delete_title():
     """حذف عنوان العجلة"""
-    result = SettingController.delete_title()
+    result = await run_db(SettingController.delete_title)
     return {"message": result["message"]}
 
 
@@ -31,14 +49,14 @@ async def delete_title():
 async def set_text_color(color: dict):
     """حفظ لون النص"""
     color_value = color.get('color', '#ffffff').strip()
-    result = SettingController.set_text_color(color_value)
+    result = await run_db(SettingController.set_text_color, color_value)
     return {"message": result["message"], "color": result["color"]}
 
 
 @router.get("/text-color")
 async def get_text_color():
     """جلب لون النص"""
-    result = SettingController.get_text_color()
+    result = await run_db(SettingController.get_text_color)
     return {"color": result["color"], "exists": result["exists"]}
 
 
@@ -50,21 +68,21 @@ async def set_max_display_names(data: dict):
         max_names = int(max_names)
     except (ValueError, TypeError):
         max_names = 0
-    result = SettingController.set_max_display_names(max_names)
+    result = await run_db(SettingController.set_max_display_names, max_names)
     return {"message": result["message"], "max_names": result["max_names"]}
 
 
 @router.get("/max-display-names")
 async def get_max_display_names():
     """جلب الحد الأقصى للأسماء الظاهرة"""
-    result = SettingController.get_max_display_names()
+    result = await run_db(SettingController.get_max_display_names)
     return {"max_names": result["max_names"], "exists": result["exists"]}
 
 
 @router.get("/sound-muted")
 async def get_sound_muted():
     """جلب حالة كتم الصوت"""
-    result = SettingController.get_sound_muted()
+    result = await run_db(SettingController.get_sound_muted)
     return {"muted": result["muted"], "exists": result["exists"]}
 
 
@@ -76,5 +94,5 @@ async def set_sound_muted(data: dict):
         muted = bool(muted)
     except (ValueError, TypeError):
         muted = False
-    result = SettingController.set_sound_muted(muted)
+    result = await run_db(SettingController.set_sound_muted, muted)
     return {"message": result["message"], "muted": result["muted"]}
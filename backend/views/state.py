@@ -0,0 +1,15 @@
+"""واجهة حالة العجلة"""
+from fastapi import APIRouter
+from models.schemas import StateResponse
+from controllers.state_controller import StateController
+from utils.executors import run_db
+from utils.responses import FastJSONResponse
+
+router = APIRouter(tags=["state"])
+
+
+@router.get("/state", response_model=StateResponse)
+async def get_state():
+    """جلب حالة العجلة الكاملة عند تحميل الصفحة"""
+    # أكبر استجابة في التطبيق: تُرسل مباشرة دون التحويل العام
+    return FastJSONResponse(await run_db(StateController.get_state))
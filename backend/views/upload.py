@@ -1,34 +1,84 @@
 """واجهات رفع الملفات"""
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import json
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from controllers.upload_controller import UploadController
+from controllers.import_controller import ImportController
+from utils.executors import run_db, run_cpu
 
-router = APIRouter(prefix="/api", tags=["upload"])
+router = APIRouter(tags=["upload"])
 
 
 @router.post("/upload-wheel-image")
 async def upload_wheel_image(file: UploadFile = File(...)):
     """رفع صورة للعجلة"""
-    result = UploadController.upload_wheel_image(file)
+    # فك الصورة وإنشاء النسخ المصغرة عمل ثقيل
+    result = await run_cpu(UploadController.upload_wheel_image, file)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     return {
         "message": result["message"],
-        "url": result["url"]
+        "url": result["url"],
+        "variants": result["variants"]
     }
 
 
 @router.get("/wheel-image")
 async def get_wheel_image():
     """الحصول على رابط صورة العجلة"""
-    result = UploadController.get_wheel_image()
-    return {"url": result["url"], "exists": result["exists"]}
+    result = await run_db(UploadController.get_wheel_image)
+    return {"url": result["url"], "variants": result["variants"], "exists": result["exists"]}
 
 
 @router.delete("/wheel-image")
 async def delete_wheel_image():
     """حذف صورة العجلة"""
-    result = UploadController.delete_wheel_image()
+    result = await run_db(UploadController.delete_wheel_image)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["message"])
     return {"message": result["message"]}
 
+
+
+@router.post("/upload-participants")
+async def upload_participants(
+    file: UploadFile = File(...),
+    column: int = Query(0, ge=0),
+    has_header: bool = Query(False),
+    progress: bool = Query(False)
+):
+    """استيراد المشاركين من ملف CSV أو TXT أو XLSX"""
+    if progress:
+        # إرسال التقدم كسطور JSON بعد كل دفعة
+        # التحقق (وفتح ملفات XLSX) قبل إرسال الحالة 200
+        validation = await run_cpu(ImportController.validate, file)
+        if not validation["success"]:
+            raise HTTPException(status_code=400, detail=validation["message"])
+        events = ImportController.iter_import(file.file, validation["format"], column, has_header)
+        
+        async def progress_stream():
+            # كل دفعة تُقرأ وتُكتب في خيوط SQLite
+            try:
+                while True:
+                    event = await run_db(next, events, None)
+                    if event is None:
+                        break
+                    if event["done"]:
+                        event = {**event, "success": True}
+                    yield json.dumps(event, ensure_ascii=False) + "\n"
+            except Exception as e:
+                # الحالة 200 أُرسلت بالفعل فيُبلَّغ عن الخطأ في السطر الأخير
+                error = {"done": True, "success": False, "message": f"خطأ في قراءة الملف: {str(e)}"}
+                yield json.dumps(error, ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(progress_stream(), media_type="application/x-ndjson")
+    
+    result = await run_db(ImportController.import_participants, file, column, has_header)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["message"])
+    return {
+        "message": result["message"],
+        "processed": result["processed"],
+        "added_count": result["added_count"],
+        "skipped_count": result["skipped_count"]
+    }
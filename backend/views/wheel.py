@@ -1,19 +1,49 @@
 """واجهات عجلة الحظ"""
-from fastapi import APIRouter, HTTPException
+from typing import Dict, Optional
+from fastapi import APIRouter, Header, HTTPException, Response
+from config.config import IDEMPOTENCY_KEY_MAX_LENGTH
+from models.schemas import SpinBatchRequest, SpinBatchResponse, WinnerResponse
 from controllers.wheel_controller import WheelController
+from utils.executors import run_db
+from utils.responses import FastJSONResponse
 
-router = APIRouter(prefix="/api", tags=["wheel"])
+router = APIRouter(tags=["wheel"])
 
 
-@router.post("/spin")
-async def spin_wheel():
-    """تدوير العجلة واختيار فائز"""
-    result = WheelController.spin()
+def _check(result: Dict) -> Dict:
+    """تحويل فشل السحب إلى خطأ HTTP وإرجاع ترويسات النتيجة المكررة"""
     if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["message"])
+        # 422 عند استخدام نفس المفتاح لعملية مختلفة
+        raise HTTPException(status_code=422 if result.get("key_reused") else 400, detail=result["message"])
+    return {"Idempotent-Replayed": "true"} if result.get("replayed") else {}
+
+
+@router.post("/spin", response_model=WinnerResponse)
+async def spin_wheel(
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)
+):
+    """تدوير العجلة واختيار فائز (تكرار نفس Idempotency-Key يُرجع نفس الفائز)"""
+    result = await run_db(WheelController.spin, idempotency_key)
+    response.headers.update(_check(result))
     return {
         "winner": result["winner"],
         "remaining_count": result["remaining_count"],
         "message": result["message"]
     }
 
+
+@router.post("/spin/batch", response_model=SpinBatchResponse)
+async def spin_wheel_batch(
+    request: SpinBatchRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)
+):
+    """سحب عدة فائزين دفعة واحدة (تكرار نفس Idempotency-Key يُرجع نفس الفائزين)"""
+    result = await run_db(WheelController.spin_batch, request.count, idempotency_key)
+    headers = _check(result)
+    return FastJSONResponse({
+        "winners": result["winners"],
+        "count": result["count"],
+        "remaining_count": result["remaining_count"],
+        "message": result["message"]
+    }, headers=headers)
@@ -0,0 +1,31 @@
+"""واجهات العجلات المتعددة"""
+from fastapi import APIRouter, HTTPException, Path
+from database.db import create_wheel
+from database.wheels import DEFAULT_WHEEL, WHEEL_ID_PATTERN, current_wheel, list_wheels, wheel_exists
+from utils.executors import run_db
+
+router = APIRouter(prefix="/api/wheels", tags=["wheels"])
+
+
+async def use_wheel(wheel_id: str = Path(..., pattern=WHEEL_ID_PATTERN)):
+    """تحديد العجلة التي يخدمها الطلب من المسار /api/wheels/{wheel_id}/..."""
+    # العجلات تُنشأ فقط عبر POST /api/wheels/{wheel_id} حتى لا يُنشئ خطأ في الرابط عجلة جديدة
+    if not wheel_exists(wheel_id):
+        raise HTTPException(status_code=404, detail="العجلة غير موجودة")
+    # دالة async حتى تبقى القيمة في سياق الطلب نفسه
+    current_wheel.set(wheel_id)
+
+
+@router.get("")
+async def get_wheels():
+    """قائمة العجلات الموجودة"""
+    wheels = await run_db(list_wheels)
+    return {"wheels": wheels, "count": len(wheels)}
+
+
+@router.post("/{wheel_id}", status_code=201)
+async def add_wheel(wheel_id: str = Path(..., pattern=WHEEL_ID_PATTERN)):
+    """إنشاء عجلة جديدة بقاعدة بيانات مستقلة"""
+    if wheel_id == DEFAULT_WHEEL or not await run_db(create_wheel, wheel_id):
+        raise HTTPException(status_code=409, detail="العجلة موجودة مسبقاً")
+    return {"message": "تم إنشاء العجلة بنجاح", "wheel_id": wheel_id}
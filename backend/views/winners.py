@@ -1,21 +1,63 @@
 """واجهات الفائزين"""
-from fastapi import APIRouter, Response
+import os
+from datetime import datetime
+from typing import BinaryIO, Iterator, Optional
+from fastapi import APIRouter, HTTPException, Query
+from config.config import MAX_PAGE_SIZE
+from fastapi.responses import StreamingResponse
+from models.schemas import WinnersResponse
 from controllers.winner_controller import WinnerController
+from utils.executors import run_db, run_cpu
+from utils.responses import FastJSONResponse
 
-router = APIRouter(prefix="/api/winners", tags=["winners"])
+router = APIRouter(prefix="/winners", tags=["winners"])
 
+# حجم القطعة عند إرسال ملف PDF
+PDF_STREAM_CHUNK = 64 * 1024
 
-@router.get("")
-async def get_winners():
-    """الحصول على قائمة جميع الفائزين"""
-    winners = WinnerController.get_all()
-    return {"winners": winners, "count": len(winners)}
+
+def _iter_file(file: BinaryIO) -> Iterator[bytes]:
+    """قراءة الملف على قطع ثم إغلاقه"""
+    try:
+        while True:
+            chunk = file.read(PDF_STREAM_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+
+
+@router.get("", response_model=WinnersResponse)
+async def get_winners(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after_id: Optional[int] = Query(None, ge=0)
+):
+    """الحصول على قائمة الفائزين كاملة، أو صفحة مصفّاة منها"""
+    if limit is None and cursor is None and since is None and until is None and after_id is None:
+        winners = await run_db(WinnerController.get_all)
+        # القائمة جاهزة من قاعدة البيانات (نصوص وأرقام) فلا حاجة للتحويل العام
+        return FastJSONResponse({"winners": winners, "count": len(winners)})
+    
+    result = await run_db(
+        WinnerController.get_page, limit or MAX_PAGE_SIZE, cursor, since, until, after_id
+    )
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["message"])
+    return FastJSONResponse({
+        "winners": result["winners"],
+        "count": len(result["winners"]),
+        "next_cursor": result["next_cursor"]
+    })
 
 
 @router.delete("")
 async def clear_winners():
     """مسح قائمة الفائزين"""
-    result = WinnerController.clear_all()
+    result = await run_db(WinnerController.clear_all)
     return {"message": result["message"]}
 
 
@@ -23,16 +65,17 @@ async def clear_winners():
 async def download_winners_pdf():
     """تنزيل قائمة الفائزين بصيغة PDF"""
     try:
-        pdf_buffer = WinnerController.generate_pdf()
-        from datetime import datetime
+        pdf_file = await run_cpu(WinnerController.generate_pdf)
+        size = pdf_file.seek(0, os.SEEK_END)
+        pdf_file.seek(0)
         filename = f"winners_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
-        return Response(
-            content=pdf_buffer.read(),
+        return StreamingResponse(
+            _iter_file(pdf_file),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Type": "application/pdf; charset=utf-8"
+                "Content-Length": str(size)
             }
         )
     except Exception as e:
@@ -43,6 +86,5 @@ async def download_winners_pdf():
         print("خطأ في إنشاء PDF:")
         print(error_detail)
         print("=" * 50)
-        from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=f"خطأ في إنشاء PDF: {str(e)}")
 
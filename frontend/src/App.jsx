@@ -50,7 +50,11 @@ const splitFullName = (name) => {
   return { line1, line2 }
 }
 
-const API_BASE_URL = 'http://localhost:8000/api'
+// عجلة مستقلة عبر ?wheel=<id> في رابط الصفحة، وإلا العجلة الافتراضية
+const WHEEL_ID = new URLSearchParams(window.location.search).get('wheel')
+const API_BASE_URL = WHEEL_ID
+  ? `http://localhost:8000/api/wheels/${encodeURIComponent(WHEEL_ID)}`
+  : 'http://localhost:8000/api'
 
 function App() {
   const [participants, setParticipants] = useState([])
@@ -77,6 +81,7 @@ function App() {
   const spinningAudioRef = useRef(null)
   const winningAudioRef = useRef(null)
   const audioContextRef = useRef(null)
+  const isSpinningRef = useRef(false)
 
   // تهيئة Audio Context للأصوات
   useEffect(() => {
@@ -400,15 +405,70 @@ function App() {
     }
   }
 
-  // جلب البيانات عند تحميل الصفحة
+  // جلب البيانات عند تحميل الصفحة (طلب واحد للحالة الكاملة)
   useEffect(() => {
-    fetchParticipants()
-    fetchWinners()
-    fetchWheelImage()
-    fetchWheelTitle()
-    fetchTextColor()
-    fetchMaxDisplayNames()
-    fetchSoundMuted()
+    fetchState()
+  }, [])
+
+  useEffect(() => {
+    isSpinningRef.current = isSpinning
+  }, [isSpinning])
+
+  // مزامنة فورية مع الشاشات الأخرى عبر Server-Sent Events بدلاً من إعادة جلب القوائم
+  useEffect(() => {
+    if (!window.EventSource) return
+    const source = new EventSource(`${API_BASE_URL}/events`)
+    // بعد انقطاع الاتصال يعيد المتصفح الاتصال تلقائياً لكن أحداث فترة الانقطاع تضيع،
+    // لذا تُجلب الحالة كاملة عند كل اتصال بعد الأول
+    let connected = false
+    source.addEventListener('open', () => {
+      if (connected) fetchState()
+      connected = true
+    })
+    const on = (type, handler) => {
+      source.addEventListener(type, (e) => handler(JSON.parse(e.data)))
+    }
+
+    on('participant_added', ({ name }) => {
+      setParticipants(prev => prev.includes(name) ? prev : [name, ...prev])
+    })
+    on('participant_removed', ({ name }) => {
+      setParticipants(prev => prev.filter(p => p !== name))
+    })
+    on('participants_added', () => fetchParticipants())
+    on('participants_cleared', () => setParticipants([]))
+    on('winner_drawn', ({ winner, won_at }) => {
+      // أثناء الدوران المحلي تتولى دالة الدوران تحديث القوائم
+      if (isSpinningRef.current) return
+      setParticipants(prev => prev.filter(p => p !== winner))
+      setWinners(prev => [{ name: winner, won_at }, ...prev])
+    })
+    on('winners_drawn', ({ winners: drawn, won_at }) => {
+      const drawnSet = new Set(drawn)
+      setParticipants(prev => prev.filter(p => !drawnSet.has(p)))
+      setWinners(prev => [...drawn.map(name => ({ name, won_at })).reverse(), ...prev])
+    })
+    on('winners_cleared', () => setWinners([]))
+    on('setting_changed', ({ settings }) => {
+      if ('wheel_title' in settings) setWheelTitle(settings.wheel_title)
+      if ('text_color' in settings) setTextColor(settings.text_color)
+      if ('max_display_names' in settings) setMaxDisplayNames(settings.max_display_names)
+      if ('sound_muted' in settings) setSoundMuted(settings.sound_muted)
+      setForceRedraw(prev => prev + 1)
+    })
+    on('wheel_image_changed', (data) => {
+      if (data.exists) {
+        applyWheelImage(data)
+      } else {
+        imageRef.current = null
+        setWheelImageUrl(null)
+        setForceRedraw(prev => prev + 1)
+      }
+    })
+    // العميل تأخر عن الأحداث: إعادة جلب الحالة كاملة
+    on('resync', () => fetchState())
+
+    return () => source.close()
   }, [])
 
   // إدارة وضع Fullscreen
@@ -466,21 +526,48 @@ function App() {
     }
   }
 
-  const fetchWheelImage = async () => {
-    try {
-      const response = await axios.get(`${API_BASE_URL}/wheel-image`)
-      if (response.data.exists) {
-        setWheelImageUrl(`http://localhost:8000${response.data.url}`)
-        const img = new Image()
-        img.crossOrigin = 'anonymous'
-        img.src = `http://localhost:8000${response.data.url}`
-        img.onload = () => {
-          imageRef.current = img
-          setForceRedraw(prev => prev + 1)
-        }
+  // اختيار نسخة مصغرة مناسبة لمنتصف العجلة بدلاً من الصورة الأصلية
+  const pickWheelImageUrl = (data) => {
+    const variant = data.variants && data.variants['512']
+    return variant ? variant.webp : data.url
+  }
+
+  const applyWheelImage = (data) => {
+    if (data.exists) {
+      const url = pickWheelImageUrl(data)
+      setWheelImageUrl(`http://localhost:8000${url}`)
+      const img = new Image()
+      img.crossOrigin = 'anonymous'
+      img.src = `http://localhost:8000${url}`
+      img.onload = () => {
+        imageRef.current = img
+        setForceRedraw(prev => prev + 1)
       }
+    }
+  }
+
+  const fetchState = async () => {
+    try {
+      const response = await axios.get(`${API_BASE_URL}/state`)
+      const { participants, winners, wheel_image, settings } = response.data
+      setParticipants(participants)
+      setWinners(winners)
+      applyWheelImage(wheel_image)
+      setWheelTitle(settings.wheel_title || '')
+      setTextColor(settings.text_color || '#333333')
+      setMaxDisplayNames(settings.max_display_names || 0)
+      setSoundMuted(settings.sound_muted || false)
+      // إعادة رسم العجلة بعد تحميل الحالة
+      setTimeout(() => {
+        setForceRedraw(prev => prev + 1)
+      }, 50)
     } catch (error) {
-      console.error('خطأ في جلب صورة العجلة:', error)
+      // العجلات تُنشأ عبر POST /api/wheels/{id} ولا تُنشأ من الرابط تلقائياً
+      if (WHEEL_ID && error.response?.status === 404) {
+        alert(`العجلة "${WHEEL_ID}" غير موجودة`)
+        return
+      }
+      console.error('خطأ في جلب حالة العجلة:', error)
     }
   }
 
@@ -503,12 +590,13 @@ function App() {
         }
       })
       
+      const url = pickWheelImageUrl(response.data)
       const img = new Image()
       img.crossOrigin = 'anonymous'
-      img.src = `http://localhost:8000${response.data.url}`
+      img.src = `http://localhost:8000${url}`
       img.onload = () => {
         imageRef.current = img
-        setWheelImageUrl(`http://localhost:8000${response.data.url}`)
+        setWheelImageUrl(`http://localhost:8000${url}`)
         setForceRedraw(prev => prev + 1)
       }
       alert('تم رفع الصورة بنجاح')
@@ -529,17 +617,6 @@ function App() {
     }
   }
 
-  const fetchWheelTitle = async () => {
-    try {
-      const response = await axios.get(`${API_BASE_URL}/settings/title`)
-      if (response.data.exists) {
-        setWheelTitle(response.data.title)
-      }
-    } catch (error) {
-      console.error('خطأ في جلب العنوان:', error)
-    }
-  }
-
   const saveWheelTitle = async (title) => {
     try {
       await axios.post(`${API_BASE_URL}/settings/title`, { title })
@@ -560,23 +637,6 @@ function App() {
     }
   }
 
-  const fetchTextColor = async () => {
-    try {
-      const response = await axios.get(`${API_BASE_URL}/settings/text-color`)
-      // دائماً نجلب اللون حتى لو لم يكن موجوداً (سيستخدم الافتراضي)
-      if (response.data.exists && response.data.color) {
-        setTextColor(response.data.color)
-      } else {
-        // إذا لم يكن هناك لون محفوظ، نستخدم الافتراضي
-        setTextColor('#333333')
-      }
-    } catch (error) {
-      console.error('خطأ في جلب لون النص:', error)
-      // في حالة الخطأ، نستخدم اللون الافتراضي
-      setTextColor('#333333')
-    }
-  }
-
   const saveTextColor = async (color) => {
     try {
       await axios.post(`${API_BASE_URL}/settings/text-color`, { color })
@@ -588,27 +648,6 @@ function App() {
     }
   }
 
-  const fetchMaxDisplayNames = async () => {
-    try {
-      const response = await axios.get(`${API_BASE_URL}/settings/max-display-names`)
-      if (response.data.exists) {
-        setMaxDisplayNames(response.data.max_names)
-      }
-    } catch (error) {
-      console.error('خطأ في جلب الحد الأقصى للأسماء:', error)
-    }
-  }
-
-  const fetchSoundMuted = async () => {
-    try {
-      const response = await axios.get(`${API_BASE_URL}/settings/sound-muted`)
-      setSoundMuted(response.data.muted || false)
-    } catch (error) {
-      console.error('خطأ في جلب حالة كتم الصوت:', error)
-      setSoundMuted(false)
-    }
-  }
-
   const saveSoundMuted = async (muted) => {
     try {
       await axios.post(`${API_BASE_URL}/settings/sound-muted`, { muted })
@@ -746,8 +785,23 @@ function App() {
     let winnerName = null
     let winnerIndex = -1
     
+    // مفتاح واحد لكل تدوير: إعادة المحاولة بعد انقطاع الشبكة تُرجع نفس الفائز ولا تسحب فائزاً ثانياً
+    const idempotencyKey = window.crypto && window.crypto.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+    const requestSpin = () => axios.post(`${API_BASE_URL}/spin`, null, {
+      headers: { 'Idempotency-Key': idempotencyKey }
+    })
+
     try {
-      const response = await axios.post(`${API_BASE_URL}/spin`)
+      let response
+      try {
+        response = await requestSpin()
+      } catch (error) {
+        // إعادة المحاولة مرة واحدة فقط إذا لم يصل أي رد من السيرفر
+        if (error.response) throw error
+        response = await requestSpin()
+      }
       winnerName = response.data.winner
       // البحث عن index الفائز في القائمة
       winnerIndex = participants.findIndex(p => p === winnerName)